@@ -0,0 +1,123 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""
+Benchmarks the model's request scheduler on a burst of table refreshes followed by a user's write
+
+The tabs refresh their tables many times while the REST server responds slowly,
+then the user creates a trail. Unscheduled, every refresh is sent at once;
+scheduled, the stale queued refreshes are cancelled and the write goes first.
+Run from the repository's root (the REST server gets an artificial latency):
+
+    PYTHONPATH=src:demos/tabs_and_tables python benchmarks/burst.py --latency-ms 50
+"""
+
+# pylint: disable=import-error,no-member,protected-access
+
+import argparse
+import asyncio
+import queue
+import time
+
+import rest
+from model import Model
+from rest import Server
+from throttle import RequestScheduler
+
+import psga
+
+
+class _Window:
+    """The part of sg.Window that the model uses, without a display"""
+
+    def __init__(self):
+        self._events = queue.Queue()
+
+    def write_event_value(self, key, value):
+        self._events.put((key, value))
+
+    def read(self, timeout: float):
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None, None
+
+
+class _Server:
+    """Counts the requests that reach the server and the most that are handled at once"""
+
+    def __init__(self):
+        self.requests = self.in_flight = self.most_in_flight = 0
+
+    def reset(self):
+        self.requests = self.most_in_flight = 0
+
+    async def __call__(self, delay: float, request, call_next):
+        self.requests += 1
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+            return await call_next(request)
+        finally:
+            self.in_flight -= 1
+
+
+class _Unscheduled(RequestScheduler):
+    """Sends each request right away, as the model did before its request scheduler"""
+
+    def __init__(self):
+        super().__init__(concurrency=1_000_000, rate=1e9, burst=1_000_000)
+
+    def submit(self, events, key, request, cookie, priority=RequestScheduler.READ, stale=None):
+        super().submit(events, key, request, cookie, priority)  # cancels none
+
+
+def _burst(requests: RequestScheduler, refreshes: int, id_: int, idle: float) -> float:
+    """Returns the seconds till the write's response, handles the events till the server idles"""
+    dispatcher, window = psga.Dispatcher(), _Window()
+    model = Model(dispatcher, window, requests=requests)
+    for i in range(refreshes):  # e.g. the user types a filter, each key press refreshes
+        model.read(("demo/trails", "demo/cities")[i % 2], filters={"name": str(i)})
+    start = time.perf_counter()
+    model.create("demo/trails", id=id_, name="Written", location="Here", description="")
+
+    written = None
+    while (event := window.read(idle))[0] is not None:
+        if event[0] == Model._on_created.name:
+            written = time.perf_counter() - start
+        dispatcher.dispatch(event[0], {event[0]: event[1]})
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--refreshes", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="per host")
+    parser.add_argument("--rate", type=float, default=20, help="requests per second per host")
+    args = parser.parse_args()
+
+    server = _Server()
+    rest.app.middleware("http")(
+        lambda request, call_next: server(args.latency_ms / 1000, request, call_next)
+    )
+
+    print(f"{'scheduler':<10} {'sent':>6} {'cancelled':>10} {'most at once':>13} {'write ms':>9}")
+    with Server.make_server().run_in_thread():
+        for id_, (label, requests) in enumerate(
+            (
+                ("none", _Unscheduled()),
+                ("scheduled", RequestScheduler(args.concurrency, args.rate, args.concurrency)),
+            ),
+            1000,
+        ):
+            server.reset()
+            written = _burst(requests, args.refreshes, id_, 4 * args.latency_ms / 1000)
+            print(
+                f"{label:<10} {server.requests:6} {requests.cancelled:10}"
+                f" {server.most_in_flight:13} {written * 1000:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""
+Benchmarks the Dispatcher's lookup of exact keys, menu items and patterns, with 10k patterns,
+before and after compiling the window's events
+
+Run from the repository's root:
+
+    PYTHONPATH=src python benchmarks/dispatch.py
+"""
+
+import argparse
+import fnmatch
+import timeit
+
+import PySimpleGUI as sg
+
+import psga
+
+
+def _report(label: str, statement, number: int):
+    seconds = min(timeit.repeat(statement, number=number, repeat=5))
+    print(f"{label:<48} {seconds / number * 1e9:10.0f} ns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patterns", type=int, default=10_000)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    @psga.action(name="-EXACT-")
+    def exact(_):
+        pass
+
+    plain = psga.Dispatcher().register(exact)
+
+    string_patterns = [f"-ROW-{index}-*" for index in range(args.patterns // 2)]
+    tuple_patterns = [
+        (f"-TABLE-{index}-", "+CLICKED+", (psga.ANY, 3)) for index in range(args.patterns // 2)
+    ]
+    dispatcher = psga.Dispatcher().register(exact)
+    for pattern in string_patterns + tuple_patterns:
+        dispatcher.register(psga.action(patterns=[pattern])(lambda _: None))
+
+    row = f"-ROW-{args.patterns // 4}-COL-7-"
+    cell = (f"-TABLE-{args.patterns // 4}-", "+CLICKED+", (1234, 3))
+    number = args.number
+
+    print(f"{'lookup':<48} {'per event':>13}")
+    _report("exact key, no patterns", lambda: plain.dispatch("-EXACT-", None), number)
+    _report(
+        f"exact key, {args.patterns} patterns", lambda: dispatcher.dispatch("-EXACT-", None), number
+    )
+    _report(
+        f"string pattern, {args.patterns} patterns", lambda: dispatcher.dispatch(row, None), number
+    )
+    _report(
+        f"tuple pattern, {args.patterns} patterns", lambda: dispatcher.dispatch(cell, None), number
+    )
+    _report("menu item", lambda: dispatcher.dispatch("Copy::-EXACT-", None), number)
+
+    menu = sg.Menu([["Edit", ["Copy::-EXACT-"]]])
+    dispatcher.compile(sg.Window("dispatch", [[menu, sg.Input(key=row, enable_events=True)]]))
+    _report("menu item, compiled", lambda: dispatcher.dispatch("Copy::-EXACT-", None), number)
+    _report(
+        f"string pattern, {args.patterns} patterns, compiled",
+        lambda: dispatcher.dispatch(row, None),
+        number,
+    )
+    _report(
+        f"string pattern, linear fnmatch of {len(string_patterns)}",
+        lambda: [pattern for pattern in string_patterns if fnmatch.fnmatchcase(row, pattern)],
+        max(1, number // 1000),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""
+Generates load on the demo REST server and reports its throughput and latencies per endpoint
+
+Start the server first, for example with 4 workers, then run the load from the repository's root:
+
+    python demos/tabs_and_tables/rest.py --workers 4 --db /tmp/psga_demo.sqlite &
+    python benchmarks/load.py --concurrency 16 --requests 2000
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from requests import Session
+
+
+def _place(id_: int) -> dict:
+    return {"id": id_, "name": f"Place {id_}", "description": "Load test", "location": "Here"}
+
+
+class _Load:
+    """Sends requests from a pool of threads, each thread with its own session"""
+
+    def __init__(self, url: str, concurrency: int):
+        self._url = url
+        self._concurrency = concurrency
+        self._local = threading.local()
+
+    def _session(self) -> Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = Session()
+        return self._local.session
+
+    def _timed(self, method: str, path: str, kwargs: dict) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        response = self._session().request(method, self._url + path, **kwargs)
+        return time.perf_counter() - start, response.ok
+
+    def run(self, method: str, label: str, calls: List[Tuple[str, dict]]):
+        """Sends the (path, request keyword arguments) calls and prints the statistics"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self._concurrency) as pool:
+            results = list(pool.map(lambda call: self._timed(method, *call), calls))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency * 1000 for latency, _ in results]
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        errors = sum(1 for _, ok in results if not ok)
+        print(
+            f"{method + ' ' + label:<34} {len(results) / elapsed:9.0f} {percentiles[49]:8.2f}"
+            f" {percentiles[89]:8.2f} {percentiles[98]:8.2f} {errors:7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="per endpoint")
+    parser.add_argument("--batch", type=int, default=10, help="places per batch request")
+    args = parser.parse_args()
+
+    load = _Load(args.url, args.concurrency)
+    count, size = args.requests, args.batch
+    first_id = 1_000_000 * (1 + int(time.time()) % 1000)  # new ids for each run
+
+    print(f"{'endpoint':<34} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for collection in ("trails", "cities"):
+        path = f"/demo/{collection}"
+        ids = range(first_id, first_id + count)
+        batches = [range(id_, id_ + size) for id_ in range(ids.stop, ids.stop + count * size, size)]
+        query = {"sort": "-name", "fields": "id,name"}
+
+        load.run("POST", path, [(path, {"json": _place(id_)}) for id_ in ids])
+        load.run("GET", path + "/{id}", [(f"{path}/{id_}", {}) for id_ in ids])
+        load.run("PUT", path + "/{id}", [(f"{path}/{id_}", {"json": _place(id_)}) for id_ in ids])
+        load.run("GET", path, [(path, {})] * count)
+        load.run("GET", path + "?sort&fields", [(path, {"params": query})] * count)
+        load.run(
+            "POST",
+            path + "/batch",
+            [(path + "/batch", {"json": [_place(id_) for id_ in batch]}) for batch in batches],
+        )
+        load.run("DELETE", path + "?id", [(path, {"params": {"id": list(b)}}) for b in batches])
+        load.run("DELETE", path + "/{id}", [(f"{path}/{id_}", {}) for id_ in ids])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""
+Benchmarks the payload size and decode time of a large listing per encoding and compression
+
+The listing crosses a throttled link: the client reads the response's bytes
+at the given bandwidth, then decompresses and decodes them.
+Run from the repository's root:
+
+    PYTHONPATH=src:demos/tabs_and_tables python benchmarks/payload.py --places 5000 --mbps 10
+"""
+
+# pylint: disable=import-error
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+
+from requests import Session
+from rest import Server
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+WORDS = "river rock forest trail town medieval coast cave stream wall pink granite old".split()
+
+
+def _place(id_: int, rng: random.Random) -> dict:
+    return {
+        "id": id_,
+        "name": " ".join(rng.choices(WORDS, k=3)).title(),
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(20, 60))).capitalize(),
+        "location": f"Location {rng.randint(1, 500)}",
+    }
+
+
+def _fetch(session: Session, url: str, params: dict, headers: dict, mbps: float):
+    """Returns the response's wire bytes, the seconds to receive them and the decoded payload's"""
+    start = time.perf_counter()
+    with session.get(url, params=params, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        body = b""
+        for chunk in response.raw.stream(16 * 1024, decode_content=False):
+            body += chunk
+            time.sleep(len(chunk) * 8 / (mbps * 1e6))  # the throttled link
+        received = time.perf_counter() - start
+
+        start = time.perf_counter()
+        encoding = response.headers.get("Content-Encoding")
+        if "gzip" == encoding:
+            data = gzip.decompress(body)
+        elif "br" == encoding:
+            data = brotli.decompress(body)
+        else:
+            data = body
+        if response.headers["Content-Type"].startswith("application/msgpack"):
+            payload = msgpack.unpackb(data)
+        else:
+            payload = json.loads(data)
+    return len(body), received, time.perf_counter() - start, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--places", type=int, default=5000)
+    parser.add_argument("--mbps", type=float, default=10, help="the link's bandwidth")
+    parser.add_argument("--fields", default="id,name,location", help="the table's columns")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    url = "http://localhost:8000/demo/trails"
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    media_types = ["application/json"] + (["application/msgpack"] if msgpack is not None else [])
+
+    with Server.make_server().run_in_thread(), Session() as session:
+        places = [_place(id_, rng) for id_ in range(1000, 1000 + args.places)]
+        session.post(url + "/batch", json=places).raise_for_status()
+
+        print(
+            f"{'fields':<8} {'encoding':<20} {'compression':<12} {'KiB':>8}"
+            f" {'receive ms':>11} {'decode ms':>10}"
+        )
+        for fields in ({}, {"fields": args.fields}):
+            for media_type in media_types:
+                for encoding in encodings:
+                    headers = {"Accept": media_type, "Accept-Encoding": encoding}
+                    runs = [
+                        _fetch(session, url, fields, headers, args.mbps) for _ in range(args.runs)
+                    ]
+                    assert len(runs[0][3]) == len(places) + 4  # and the demo's trails
+                    print(
+                        f"{'table' if fields else 'all':<8} {media_type:<20} {encoding:<12}"
+                        f" {runs[0][0] / 1024:8.1f}"
+                        f" {statistics.median(run[1] for run in runs) * 1000:11.1f}"
+                        f" {statistics.median(run[2] for run in runs) * 1000:10.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
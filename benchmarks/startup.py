@@ -0,0 +1,96 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""
+Benchmarks the time to the first populated table: cold, with the model's DiskCache
+and on a warm restart from a psga.Snapshot of the previous run
+
+Run from the repository's root (the REST server gets an artificial latency):
+
+    PYTHONPATH=src:demos/tabs_and_tables python benchmarks/startup.py --latency-ms 50
+"""
+
+# pylint: disable=import-error
+
+import argparse
+import asyncio
+import os
+import queue
+import statistics
+import tempfile
+import time
+
+import rest
+from cache import DiskCache
+from model import Model
+from rest import Server
+
+import psga
+
+
+class _Window:
+    """The part of sg.Window that the model uses, without a display"""
+
+    def __init__(self):
+        self._events = queue.Queue()
+
+    def write_event_value(self, key, value):
+        self._events.put((key, value))
+
+    def read(self):
+        return self._events.get()
+
+
+def _first_table(resource: str, cache=None, snapshot=None) -> float:
+    """Returns the seconds from launch till the first data for given resource"""
+    start = time.perf_counter()
+    dispatcher, window = psga.Dispatcher(), _Window()
+    model = Model(dispatcher, window, cache)
+    if snapshot is not None:
+        psga.Snapshot(dispatcher, snapshot).add("model", model).restore()
+    model.read(resource)
+    while True:
+        event, value = window.read()
+        if event == resource and isinstance(value, list):
+            return time.perf_counter() - start
+        dispatcher.dispatch(event, {event: value})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    @rest.app.middleware("http")
+    async def _latency(request, call_next):
+        await asyncio.sleep(args.latency_ms / 1000)
+        return await call_next(request)
+
+    resource = "demo/trails"
+    with tempfile.TemporaryDirectory() as directory, Server.make_server().run_in_thread():
+        cache = DiskCache(os.path.join(directory, "cache.sqlite"))
+        _first_table(resource, cache)  # fills the cache as a previous run would
+
+        snapshot = os.path.join(directory, "snapshot")
+        dispatcher = psga.Dispatcher()
+        model = Model(dispatcher, _Window(), cache)
+        model.read(resource)  # the cached items, as a previous run's model holds them
+        psga.Snapshot(dispatcher, snapshot).add("model", model).save()
+
+        for label, used_cache, used_snapshot in (
+            ("without cache", None, None),
+            ("with cache", cache, None),
+            ("with snapshot", None, snapshot),
+        ):
+            times = [
+                _first_table(resource, used_cache, used_snapshot) * 1000 for _ in range(args.runs)
+            ]
+            print(
+                f"{label:>14}: median {statistics.median(times):8.2f} ms, max {max(times):8.2f} ms"
+            )
+        print(f"{'snapshot':>14}: {os.path.getsize(snapshot)} bytes")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
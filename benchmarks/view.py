@@ -0,0 +1,153 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""
+Benchmarks the Tk calls per event, updating a table directly, through a ViewState or a Store
+
+Each round, the user selects a table row and a burst of REST responses, each changing one item,
+arrives in the EventChannel. The time per event excludes Tk's work (there is no display).
+Run from the repository's root:
+
+    PYTHONPATH=src python benchmarks/view.py --rounds 1000 --burst 8
+"""
+
+import argparse
+import functools
+import queue
+import time
+from typing import Callable, Dict, List
+
+import psga
+
+
+class _Element:
+    """Counts the calls that would reach Tk"""
+
+    def __init__(self, window: "_Window"):
+        self._window = window
+
+    def update(self, values=None, num_rows=None, select_rows=None):  # as sg.Table's, merges
+        self._window.tk_calls += 1
+        self._window.tk_rows += len(values or [])  # Tk re-inserts all rows
+
+    def __getattr__(self, method: str) -> Callable:
+        def _call(*_, **__):
+            self._window.tk_calls += 1
+
+        return _call
+
+
+class _Window:
+    """The part of sg.Window that the dispatcher's loop and the controller use, without a display"""
+
+    def __init__(self, refill: Callable[[], None]):
+        self._events = queue.Queue()
+        self._refill = refill
+        self.tk_calls = self.tk_rows = 0
+
+    def __getitem__(self, key) -> _Element:
+        return _Element(self)
+
+    def write_event_value(self, key, value):
+        self._events.put((key, value))
+
+    def read(self, *_):
+        if self._events.empty():
+            self._refill()
+        return self._events.get()
+
+
+HEADINGS = ["id", "name", "location", "description"]
+
+
+class _TableCtr(psga.Controller):
+    """Shows the items in a table and sets its menu on a selection, as the demo's tabs do"""
+
+    def __init__(self, dispatcher: psga.Dispatcher, window: _Window, mode: str):
+        super().__init__(dispatcher)
+        self._mode = mode
+        self._view = psga.ViewState(dispatcher, window) if "direct" != mode else window
+        self._store = psga.Store(dispatcher, self._view)
+        self._ids: List[int] = []
+        self._store.derive(
+            "rows", lambda store: [store.get(("row", id_)) for id_ in store.get("ids", [])]
+        )
+        self._store.bind("rows", _TableCtr.on_table.name, "values")
+
+    @staticmethod
+    def _row(id_: int, store: psga.Store) -> List:
+        item = store.get(("item", id_))
+        return [item.get(heading, "") for heading in HEADINGS]
+
+    @psga.action()
+    def on_table(self, values):
+        """sets the table's menu for its selected rows"""
+        menu = ["Copy", "Delete"] if values[self.on_table.name] else ["Create"]
+        self._view[self.on_table.name].set_right_click_menu(["", menu])
+
+    @psga.action()
+    def on_data(self, values):
+        """shows the items"""
+        items: List[Dict] = values[self.on_data.name]
+        if "Store" == self._mode:
+            ids = [item["id"] for item in items]
+            for id_ in set(ids).difference(self._ids):
+                self._store.derive(("row", id_), functools.partial(self._row, id_))
+            for item in items:
+                self._store.set(("item", item["id"]), item)
+            self._store.set("ids", ids)
+            self._ids = ids
+        else:
+            rows = [[item.get(heading, "") for heading in HEADINGS] for item in items]
+            self._view[self.on_table.name].update(values=rows)
+
+
+def _run(mode: str, rounds: int, burst: int, rows: int):
+    """Returns the window, the handled events and the seconds for the rounds"""
+    remaining, events = rounds, 0
+    items = [
+        {"id": i, "name": f"Trail {i}", "location": "Here", "description": ""} for i in range(rows)
+    ]
+
+    def _refill():
+        nonlocal remaining, events
+        if remaining == 0:
+            window.write_event_value("Exit", None)
+            return
+        remaining -= 1
+        window.write_event_value(_TableCtr.on_table.name, {_TableCtr.on_table.name: [0]})
+        for _ in range(burst):
+            changed = dict(items[events % rows], description=f"Change {events}")
+            items[events % rows] = changed  # a new item, as decoded from a response
+            channel.write_event_value(_TableCtr.on_data.name, list(items))
+            events += 1
+        events += 1
+
+    window, dispatcher = _Window(_refill), psga.Dispatcher()
+    channel = psga.EventChannel(dispatcher, window, maxsize=burst)
+    _TableCtr(dispatcher, window, mode)
+
+    start = time.perf_counter()
+    dispatcher.loop(window)
+    return window, events, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--burst", type=int, default=8, help="REST responses per round")
+    parser.add_argument("--rows", type=int, default=100, help="items in each response")
+    args = parser.parse_args()
+
+    print(
+        f"{'updates':<10} {'events':>8} {'Tk calls/event':>15} {'Tk rows/event':>14} {'µs/event':>9}"
+    )
+    for mode in ("direct", "ViewState", "Store"):
+        window, events, elapsed = _run(mode, args.rounds, args.burst, args.rows)
+        print(
+            f"{mode:<10} {events:8} {window.tk_calls / events:15.3f}"
+            f" {window.tk_rows / events:14.1f} {elapsed / events * 1e6:9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Runs a CPU-heavy controller in a worker process while the UI stays responsive"""
+
+# pylint: disable=no-member,import-error,too-few-public-methods
+
+import PySimpleGUI as sg
+
+import psga
+
+
+class AnalysisCtr(psga.Controller):
+    """Counts the primes below a number; runs in the worker process"""
+
+    def __init__(self, dispatcher: psga.Dispatcher, window):
+        super().__init__(dispatcher)
+        # PSGA: the worker's window forwards the element calls to the GUI's window
+        self._window = window
+
+    @psga.action(name="-COUNT-")
+    def on_count(self, values):
+        """Counts the primes by trial division"""
+        limit = int(values["-LIMIT-"])
+        count = sum(1 for n in range(2, limit) if all(n % d for d in range(2, int(n**0.5) + 1)))
+        self._window["-RESULT-"].update(f"{count} primes below {limit}")
+
+
+def setup_worker(dispatcher: psga.Dispatcher, window):
+    """Creates the worker process' controllers (a module level function, it is pickled)"""
+    AnalysisCtr(dispatcher, window)
+
+
+def main():
+    """Shows a ticking counter while the worker counts primes"""
+    layout = [
+        [sg.Text("Primes below"), sg.Input("2000000", key="-LIMIT-", size=(10, 1))],
+        [sg.Button("Count", key=AnalysisCtr.on_count.name), sg.Button("Exit")],
+        [sg.Text("", key="-RESULT-", size=(30, 1))],
+        [sg.Text("The UI keeps ticking:"), sg.Text("0", key="-TICKS-")],
+    ]
+    window = sg.Window("Process group", layout, finalize=True)
+
+    dispatcher = psga.Dispatcher()
+    # PSGA: the "-COUNT-" events run in the worker process' own dispatcher
+    group = psga.ProcessGroup(dispatcher, window, setup_worker, keys=[AnalysisCtr.on_count.name])
+
+    ticks = 0
+
+    # PSGA: an action in the GUI's process, invoked by a timer
+    @psga.action()
+    def _on_tick(_):
+        nonlocal ticks
+        ticks += 1
+        window["-TICKS-"].update(ticks)
+
+    # PSGA: the scheduler makes the loop's read wait until the next timer's deadline
+    psga.Scheduler(dispatcher).every(0.1, _on_tick.name)
+    dispatcher.register(_on_tick).loop(window)
+
+    group.close(1)
+    window.close()
+
+
+if __name__ == "__main__":  # PSGA: the worker process imports this module
+    main()
@@ -0,0 +1,84 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""A persistent cache that keeps the model's last payloads in a SQLite file"""
+
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """Keeps the last payload per key on disk, evicting the least recently used beyond max_bytes
+
+    Only use it from the thread that created it (PySimpleGUI's event loop thread).
+    It does not wait on a disk sync for each read and unchanged payload:
+    the last uses are written with the next change or when closing.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024):
+        self._max_bytes = max_bytes
+        self._used: Dict[str, float] = {}  # the last uses that are not written yet
+        self._hashes: Dict[str, int] = {}  # the known hash of a key's payload on disk
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")  # a commit does not sync in WAL
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS payloads (key TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the payload last put for given key or None"""
+        row = self._connection.execute(
+            "SELECT payload FROM payloads WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._used[key] = time.time()
+        self._hashes[key] = hash(row[0])
+        return json.loads(row[0])
+
+    def put(self, key: str, payload: Any):
+        """Stores given payload for given key, then evicts to stay within the size limit"""
+        blob = json.dumps(payload, separators=(",", ":")).encode()
+        self._used[key] = time.time()
+        if self._hashes.get(key) == hash(blob):  # e.g. a revalidated payload
+            return
+        with self._connection:
+            self._write_uses()
+            if len(blob) > self._max_bytes:
+                self._connection.execute("DELETE FROM payloads WHERE key = ?", (key,))
+                self._hashes.pop(key, None)
+                return
+            self._connection.execute(
+                "INSERT OR REPLACE INTO payloads VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._hashes[key] = hash(blob)
+            self._evict()
+
+    def _write_uses(self):
+        self._connection.executemany(
+            "UPDATE payloads SET used = ? WHERE key = ?",
+            [(used, key) for key, used in self._used.items()],
+        )
+        self._used.clear()
+
+    def _evict(self):
+        total = self._connection.execute("SELECT TOTAL(size) FROM payloads").fetchone()[0]
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM payloads ORDER BY used"
+        ).fetchall():
+            if total <= self._max_bytes:
+                break
+            self._connection.execute("DELETE FROM payloads WHERE key = ?", (key,))
+            self._hashes.pop(key, None)
+            total -= size
+
+    def close(self):
+        """Writes the last uses and closes the underlying SQLite file"""
+        with self._connection:
+            self._write_uses()
+        self._connection.close()
@@ -5,8 +5,11 @@
 # pylint: disable=no-member,import-error,too-few-public-methods
 
 import logging
+import os
+import tempfile
 
 import PySimpleGUI as sg
+from cache import DiskCache
 from model import Model
 from rest import Server
 from tab_one import TabOneCtr
@@ -35,6 +38,16 @@ class RootCtr(psga.Controller):
             self._tab = tab
             self._window.write_event_value(tab, None)
 
+    def get_state(self):
+        return self._tab
+
+    def set_state(self, state):
+        """Activates the snapshot's tab"""
+        if state not in (TabOneCtr.on_tab.name, TabTwoCtr.on_tab.name):
+            return  # e.g. a tab that no longer exists
+        self._window[state].select()
+        self._window.write_event_value(RootCtr.on_tab_group.name, state)
+
     @staticmethod
     def layout():
         return [
@@ -65,20 +78,51 @@ def main():
     # PSGA: to dispatches all events to the registered handlers
     dispatcher = psga.Dispatcher()
 
+    # the tables show the data of the previous run while the model revalidates it
+    cache = DiskCache(os.path.join(tempfile.gettempdir(), "psga_tabs_and_tables.sqlite"))
+
     # PSGA: the model uses PSGA's dispatcher to handle PySimpleGui's background thread events
-    model = Model(dispatcher, window)
+    # PSGA: a bounded channel keeps the pending REST responses in check
+    channel = psga.EventChannel(dispatcher, window, maxsize=64)
+    model = Model(dispatcher, window, cache, channel)
+    model.follow()  # the server pushes the changes made by the other clients
 
-    # PSGA: controllers register their action handlers with the given dispatcher
-    RootCtr(dispatcher, window)
-    TabOneCtr(dispatcher, window, model)
-    TabTwoCtr(dispatcher, window, model)
+    # PSGA: the dispatcher's loop flushes the view's element updates once per event
+    view = psga.ViewState(dispatcher, window)
+    # PSGA: and updates the elements bound to the store's changed values, merged with the view's
+    store = psga.Store(dispatcher, view)
 
-    # PSGA: inject an event that makes the first tab load its table
-    window.write_event_value(RootCtr.on_tab_group.name, TabOneCtr.on_tab.name)
+    # PSGA: controllers register their action handlers with the given dispatcher
+    root = RootCtr(dispatcher, window)
+    tab_one = TabOneCtr(dispatcher, view, store, model)
+    tab_two = TabTwoCtr(dispatcher, view, store, model)
+
+    # PSGA: F12 toggles the memory profiler, it reports each minute while profiling
+    psga.Profiler(dispatcher)
+    window.bind("<F12>", psga.Profiler.on_toggle.name)
+    scheduler = psga.Scheduler(dispatcher)
+    scheduler.every(60, psga.Profiler.on_report.name)
+
+    # PSGA: the snapshot restores the previous run's tab, queries, selections and tables
+    snapshot = psga.Snapshot(
+        dispatcher, os.path.join(tempfile.gettempdir(), "psga_tabs_and_tables.snapshot")
+    )
+    snapshot.add("root", root).add("model", model).add("one", tab_one).add("two", tab_two)
+    scheduler.every(60, psga.Snapshot.on_save.name)  # PSGA: survives a crash too
+
+    # PSGA: restore before the loop's first read, else inject an event that loads the first tab
+    if not snapshot.restore():
+        window.write_event_value(RootCtr.on_tab_group.name, TabOneCtr.on_tab.name)
+
+    # PSGA: resolve the layout's keys, menu items and bindings once and report the unhandled ones
+    # PSGA: (the dynamic table menus and the model's events are written at run time)
+    dispatcher.compile(window)
 
     dispatcher.loop(window)  # PSGA: process the PySimpleGui-events; very simple "event loop"
 
+    snapshot.save()
     window.close()
+    cache.close()
 
 
 if __name__ == "__main__":
@@ -1,41 +1,84 @@
 # Copyright 2024 Francis Meyvis <psga@mikmak.fun>
 
-"""The data model that uses a REST service to manage its data."""
+"""The data model that uses a REST service to manage its data.
+
+Creating and deleting, of one or many items, are optimistic:
+the change is applied to the cached items and shown right away.
+The server's response confirms the change in the background, a rejected change is rolled back.
+Until then, the change is applied on top of each read's payload;
+a read sent before a change that has since been confirmed is sent again.
+
+With a DiskCache, reading shows the payload cached on disk right away
+and then revalidates it with the server in the background.
+
+The listings are fetched compressed and, with msgpack installed, binary encoded.
+
+A RequestScheduler keeps the requests within the server's limits,
+the user's changes go before the background reads.
+
+Following the server's change feed keeps the read items up to date
+with the changes that other clients make, without polling.
+
+A psga.Snapshot restores the previous run's queries and items at launch.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import PySimpleGUI as sg
-from requests import HTTPError, Request, Session
+from cache import DiskCache
+from requests import Request, RequestException, Session
+from throttle import RequestScheduler
 
 import psga
 
-# pylint: disable=no-member,too-few-public-methods
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# pylint: disable=no-member,too-few-public-methods,too-many-instance-attributes
 
+# the server's listings in binary when possible (requests negotiates and decodes the compression)
+_ACCEPT = {"Accept": "application/msgpack, application/json;q=0.9"} if msgpack is not None else {}
 
-class _RestRequest:
-    def __init__(self, window: sg.Window, key: str, request: Request, cookie: str):
-        self._cookie = cookie
-        window.perform_long_operation(lambda: self._send_request(request), key)
 
-    def _send_request(self, request: Request):
-        session = Session()
-        response = session.send(session.prepare_request(request))
-        try:
-            response.raise_for_status()
-        except HTTPError as ex:
-            response = ex
-        return (response, self._cookie)
+def _decode(response) -> Any:
+    if response.headers.get("Content-Type", "").startswith("application/msgpack"):
+        return msgpack.unpackb(response.content)
+    return response.json()
 
 
 class Model:
     """Manages the data from a cloud service through REST calls"""
 
-    def __init__(self, dispatcher: psga.Dispatcher, window: sg.Window):
+    def __init__(
+        self,
+        dispatcher: psga.Dispatcher,
+        window: sg.Window,
+        cache: Optional[DiskCache] = None,
+        channel: Optional[psga.EventChannel] = None,
+        requests: Optional[RequestScheduler] = None,
+    ):
         self._window: sg.Window = window
+        self._events = window if channel is None else channel  # for the responses
+        self._requests = RequestScheduler() if requests is None else requests
+        self._cache = cache
         self._url: str = "http://localhost:8000/"
+        self._queries: Dict[str, Dict] = {}  # the last query parameters per resource
+        self._items: Dict[str, List[Dict]] = {}  # the last known items per resource
+        # the optimistic writes per resource, by their number, until their response arrives
+        self._pending: Dict[str, Dict[int, Tuple[str, Any]]] = {}
+        self._writes: Dict[str, int] = {}  # the number of writes sent per resource
+        self._settled: Dict[str, int] = {}  # the last write per resource that got its response
 
         # PSGA: Model does not inherit PSGA.Dispatcher: therefore it manually register its handlers
         dispatcher.register(self._on_refreshed)
         dispatcher.register(self._on_created)
         dispatcher.register(self._on_deleted)
+        dispatcher.register(self._on_changed)
 
     def _is_exception(self, response, resource):
         if isinstance(response, Exception):
@@ -43,39 +86,243 @@ class Model:
             return True
         return False
 
-    @psga.action()  # PSGA: called by _RestRequest's perform_long_operation key
+    def _publish(self, resource: str):
+        self._window.write_event_value(resource, list(self._items.get(resource, [])))
+
+    def _cache_key(self, resource: str) -> str:
+        return resource + "?" + json.dumps(self._queries.get(resource), sort_keys=True)
+
+    def _project(self, resource: str, item: Dict) -> Dict:
+        if fields := self._queries.get(resource, {}).get("fields"):
+            return {field: item.get(field) for field in fields.split(",")}
+        return item
+
+    def _matches(self, resource: str, item: Dict) -> bool:
+        for predicate in self._queries.get(resource, {}).get("filter", []):
+            field, _, text = predicate.partition(":")
+            if text.lower() not in str(item.get(field)).lower():
+                return False
+        return True
+
+    def _find(self, resource: str, predicate) -> Optional[int]:
+        items = self._items.get(resource, [])
+        return next((index for index, item in enumerate(items) if predicate(item)), None)
+
+    def _write(self, resource: str, change: str, data: Any) -> int:
+        """Remembers an optimistic write until its response arrives and returns its number"""
+        write = self._writes[resource] = self._writes.get(resource, 0) + 1
+        self._pending.setdefault(resource, {})[write] = (change, data)
+        return write
+
+    def _settle(self, resource: str, write: int):
+        self._pending.get(resource, {}).pop(write, None)
+        self._settled[resource] = max(write, self._settled.get(resource, 0))
+
+    def _reconcile(self, resource: str, payload: List[Dict]) -> List[Dict]:
+        """Applies the pending optimistic writes on top of a read's payload"""
+        items = list(payload)
+        for change, data in self._pending.get(resource, {}).values():
+            ids = {str(item.get("id")) for item in items}
+            if "created" == change:
+                items.extend(item for item in data if str(item.get("id")) not in ids)
+            else:
+                items = [item for item in items if str(item.get("id")) not in data]
+        return items
+
+    @psga.action()  # PSGA: called by the request scheduler's key
     def _on_refreshed(self, values):
-        response, resource = values[self._on_refreshed.name]
+        response, (resource, writes) = values[self._on_refreshed.name]
 
         if not self._is_exception(response, resource):
-            self._window.write_event_value(resource, response.json())
+            if writes < self._settled.get(resource, 0):
+                # the server may have read before a write that has since been confirmed
+                self._refresh(resource)
+                return
+            payload = _decode(response)
+            if self._cache is not None:
+                self._cache.put(self._cache_key(resource), payload)
+            payload = self._reconcile(resource, payload)
+            if payload != self._items.get(resource):  # e.g. the cached payload was still valid
+                self._items[resource] = payload
+                self._publish(resource)
 
     @psga.action()
     def _on_created(self, values):
-        response, resource = values[self._on_created.name]
-        if not self._is_exception(response, resource):
-            self._refresh(resource)
+        response, (resource, items, write) = values[self._on_created.name]
+        self._settle(resource, write)
+        indices = [self._find(resource, lambda other, item=item: other is item) for item in items]
+
+        if isinstance(response, Exception):
+            for index in sorted(filter(lambda index: index is not None, indices), reverse=True):
+                del self._items[resource][index]  # roll back the optimistic creation
+            self._publish(resource)
+            self._is_exception(response, resource)
+        else:  # the response holds the server's version of the items
+            created = response.json()
+            for index, item in zip(indices, created if isinstance(created, list) else [created]):
+                if index is not None:
+                    self._items[resource][index] = self._project(resource, item)
+            self._publish(resource)
 
     @psga.action()
     def _on_deleted(self, values):
-        response, resource = values[self._on_deleted.name]
-        if not self._is_exception(response, resource):
-            self._refresh(resource)
+        response, (resource, removed, write) = values[self._on_deleted.name]
+        self._settle(resource, write)
+
+        if isinstance(response, Exception):
+            items = self._items.setdefault(resource, [])
+            for index, item in removed:  # roll back the optimistic removal
+                items.insert(min(index, len(items)), item)
+            self._publish(resource)
+            self._is_exception(response, resource)
+
+    @psga.action()  # PSGA: called by the _follow thread for each change in the feed
+    def _on_changed(self, values):
+        change = values[self._on_changed.name]
+        if "reset" == change["change"]:  # changes were missed
+            for resource in self._items:
+                self._refresh(resource)
+            return
+
+        if (resource := change["resource"]) not in self._items:
+            return  # not read yet
+
+        ids = {str(place["id"]) for place in change["places"]}
+        places = {  # the created or updated places that the query selects
+            str(place["id"]): self._project(resource, place)
+            for place in change["places"]
+            if "deleted" != change["change"] and self._matches(resource, place)
+        }
+        items = [
+            places.pop(str(item.get("id")), None) if str(item.get("id")) in ids else item
+            for item in self._items[resource]
+        ]
+        items = [item for item in items if item is not None] + list(places.values())
+
+        if sort := self._queries.get(resource, {}).get("sort"):
+            field = sort.lstrip("-")
+            try:
+                items.sort(key=lambda item: item.get(field), reverse=sort.startswith("-"))
+            except TypeError:  # e.g. an optimistic item's id is still text
+                self._refresh(resource)
+                return
+
+        if items != self._items[resource]:
+            self._items[resource] = items
+            self._publish(resource)
+
+    def _follow(self):
+        reconnect = False
+        while True:
+            try:
+                url = self._url + "demo/changes"
+                with Session() as session:
+                    with session.get(url, stream=True, timeout=(5, 60)) as response:
+                        response.raise_for_status()
+                        if reconnect:  # re-read what changed while disconnected
+                            self._events.write_event_value(
+                                self._on_changed.name, {"change": "reset"}
+                            )
+                        reconnect = True
+                        for line in response.iter_lines(decode_unicode=True):
+                            if line.startswith("data: "):
+                                change = json.loads(line[len("data: ") :])
+                                self._events.write_event_value(self._on_changed.name, change)
+            except RequestException:
+                time.sleep(1)
+
+    def get_state(self) -> Dict:
+        """Returns the queries and items to snapshot"""
+        return {"queries": self._queries, "items": self._items}
+
+    def set_state(self, state: Dict):
+        """Shows the snapshot's items right away, a later read revalidates them"""
+        self._queries.update(state["queries"])
+        self._items.update(state["items"])
+        for resource in self._items:
+            self._publish(resource)
+
+    def follow(self):
+        """Keeps the read model data up to date with the server's change feed"""
+        threading.Thread(target=self._follow, daemon=True).start()
 
     def _refresh(self, resource: str):
-        request = Request("GET", self._url + resource)
-        _RestRequest(self._window, self._on_refreshed.name, request, resource)
+        request = Request(
+            "GET", self._url + resource, params=self._queries.get(resource), headers=_ACCEPT
+        )
+        # a newer read of the resource cancels this one while it is still queued
+        # the number of writes sent tells whether a confirmed write is newer than the read
+        cookie = (resource, self._writes.get(resource, 0))
+        self._requests.submit(
+            self._events, self._on_refreshed.name, request, cookie, stale=resource
+        )
+
+    def read(
+        self,
+        resource: str,
+        sort: Optional[str] = None,
+        filters: Optional[Dict[str, str]] = None,
+        fields: Optional[List[str]] = None,
+    ):
+        """Reads a model data
 
-    def read(self, resource: str):
-        """Reads a model data"""
+        The server sorts on the sort field ("-" prefixed for descending order),
+        keeps the items whose field contains the filters' text
+        and only returns the given fields.
+        The query is remembered for later refreshes.
+        """
+        query = {}
+        if sort:
+            query["sort"] = sort
+        if filters:
+            query["filter"] = [f"{field}:{text}" for field, text in filters.items() if text]
+        if fields:
+            query["fields"] = ",".join(fields)
+        self._queries[resource] = query
+        if self._cache is not None and (payload := self._cache.get(self._cache_key(resource))):
+            self._items[resource] = payload
+            self._publish(resource)
         self._refresh(resource)
 
+    def _create(self, resource: str, url: str, items: List[Dict], body: Any):
+        self._items.setdefault(resource, []).extend(items)
+        self._publish(resource)
+
+        request = Request("POST", url, json=body)
+        cookie = (resource, items, self._write(resource, "created", items))
+        self._requests.submit(
+            self._events, self._on_created.name, request, cookie, RequestScheduler.WRITE
+        )
+
+    def _delete(self, resource: str, request: Request, resource_ids: List):
+        ids = {str(resource_id) for resource_id in resource_ids}
+        indices = [
+            index
+            for index, item in enumerate(self._items.get(resource, []))
+            if str(item.get("id")) in ids
+        ]
+        removed = [(index, self._items[resource].pop(index)) for index in reversed(indices)]
+        self._publish(resource)
+
+        cookie = (resource, removed[::-1], self._write(resource, "deleted", ids))
+        self._requests.submit(
+            self._events, self._on_deleted.name, request, cookie, RequestScheduler.WRITE
+        )
+
     def create(self, resource: str, **kwargs):
         """Creates a new model data"""
-        request = Request("POST", str(self._url) + resource, json=kwargs)
-        _RestRequest(self._window, self._on_created.name, request, resource)
+        self._create(resource, str(self._url) + resource, [dict(kwargs)], kwargs)
+
+    def create_many(self, resource: str, items: List[Dict]):
+        """Creates new model data in a single request"""
+        self._create(resource, str(self._url) + resource + "/batch", list(map(dict, items)), items)
 
     def delete(self, resource: str, resource_id: int):
         """Removes a model data"""
-        request = Request("DELETE", str(self._url) + resource + "/" + resource_id)
-        _RestRequest(self._window, self._on_deleted.name, request, resource)
+        request = Request("DELETE", str(self._url) + resource + "/" + str(resource_id))
+        self._delete(resource, request, [resource_id])
+
+    def delete_many(self, resource: str, resource_ids: List[int]):
+        """Removes model data in a single request"""
+        request = Request("DELETE", str(self._url) + resource, params={"id": resource_ids})
+        self._delete(resource, request, resource_ids)
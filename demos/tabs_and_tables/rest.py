@@ -4,19 +4,70 @@
 A built-in mock REST server in a background thread
 
 It serves on localhost:8000 for the paths "/demo/trails" and "/demo/cities"
+
+Listing a collection accepts optional query parameters so that a client
+only receives the rows and columns it displays:
+- sort: the field to order by, prefixed with "-" for descending order (e.g. "-name")
+- filter: repeatable "field:text" predicate; keeps rows whose field contains text (ignoring case)
+- fields: comma separated fields to return (e.g. "id,name")
+
+A listing is encoded as msgpack when the request accepts "application/msgpack", else as JSON,
+and compressed with brotli (when installed) or gzip when the request accepts that encoding.
+
+Many items are created or deleted in a single request with respectively
+a POST on "<collection>/batch" and a DELETE on the collection with a repeatable "id" parameter.
+A batch is all or nothing: one invalid item rejects the whole batch.
+
+Clients follow the changes to the collections with the server-sent events on "/demo/changes".
+Each event's data is a JSON object with the "resource" (e.g. "demo/trails"),
+the "change" ("created", "updated" or "deleted") and the changed "places".
+A client that falls too far behind gets a "reset" change: it should read the collections again.
+
+For load testing, run it standalone with several worker processes
+that share their data in a SQLite file (and responses encoded by orjson when installed):
+
+    python demos/tabs_and_tables/rest.py --workers 4 --db /tmp/psga_demo.sqlite
 """
 
 # pylint: disable=missing-function-docstring
 
+import argparse
+import asyncio
 import contextlib
+import gzip
+import json
+import os
+import socket
+import sqlite3
+import sys
 import threading
 import time
 from http import HTTPStatus
-from typing import Dict, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, MutableMapping, Optional, Union
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from uvicorn.supervisors import Multiprocess
+
+try:
+    import orjson  # pylint: disable=unused-import
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_JSONResponse = JSONResponse if orjson is None else ORJSONResponse
+COMPRESS_MIN_SIZE = 1024  # a smaller listing does not gain from the compression
 
 
 class Server(uvicorn.Server):
@@ -41,6 +92,22 @@ class Server(uvicorn.Server):
     def make_server() -> "Server":
         return Server(uvicorn.Config("rest:app", log_level="warning"))
 
+    async def shutdown(self, sockets=None):
+        FEED.close()  # ends the change feed's otherwise never ending responses
+        await super().shutdown(sockets)
+
+
+class _Config(uvicorn.Config):
+    """Binds the workers' shared socket as a TCP socket
+
+    uvicorn binds it with protocol 0, so asyncio does not set TCP_NODELAY on its connections:
+    a keep-alive connection's response then waits ~40 ms for the client's delayed ACK.
+    """
+
+    def bind_socket(self) -> socket.socket:
+        sock = super().bind_socket()
+        return socket.socket(sock.family, sock.type, socket.IPPROTO_TCP, sock.detach())
+
 
 class Place(BaseModel):
     """Model for a trail of city"""
@@ -51,6 +118,69 @@ class Place(BaseModel):
     location: str
 
 
+class Places(MutableMapping[int, Place]):
+    """The places of one collection in a SQLite table, shared by the server's worker processes"""
+
+    def __init__(self, path: str, table: str, places: Dict[int, Place]):
+        self._table = table
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        with self.transaction():  # only the first worker creates and fills the table
+            if not self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone():
+                self._connection.execute(
+                    f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, body TEXT NOT NULL)"
+                )
+                self.update(places)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Makes the statements within atomic, also for the other worker processes"""
+        with self._lock:
+            if self._connection.in_transaction:  # nested
+                yield
+                return
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _execute(self, sql: str, *parameters) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection.execute(sql.format(table=self._table), parameters)
+
+    def __getitem__(self, id_: int) -> Place:
+        if (row := self._execute("SELECT body FROM {table} WHERE id = ?", id_).fetchone()) is None:
+            raise KeyError(id_)
+        return Place.model_validate_json(row[0])
+
+    def __setitem__(self, id_: int, place: Place):
+        self._execute("INSERT OR REPLACE INTO {table} VALUES (?, ?)", id_, place.model_dump_json())
+
+    def __delitem__(self, id_: int):
+        if 0 == self._execute("DELETE FROM {table} WHERE id = ?", id_).rowcount:
+            raise KeyError(id_)
+
+    def __contains__(self, id_: object) -> bool:
+        return self._execute("SELECT 1 FROM {table} WHERE id = ?", id_).fetchone() is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return iter([row[0] for row in self._execute("SELECT id FROM {table} ORDER BY id")])
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def values(self) -> List[Place]:  # a single query instead of one per id
+        rows = self._execute("SELECT body FROM {table} ORDER BY id").fetchall()
+        return [Place.model_validate_json(row[0]) for row in rows]
+
+
 TRAILS: Dict[int, Place] = {
     place["id"]: Place.model_validate(place)
     for place in [
@@ -107,92 +237,363 @@ CITIES: Dict[int, Place] = {
 }
 
 
-async def _check_exists(resource: Dict[int, Place], id_: int):
+# the handlers that use the collections run in FastAPI's threadpool, off the event loop
+_LOCK = threading.RLock()  # for the in-memory dicts
+
+
+def _transaction(resource: MutableMapping[int, Place]):
+    return resource.transaction() if isinstance(resource, Places) else _LOCK
+
+
+def _check_exists(resource: MutableMapping[int, Place], id_: int):
     if id_ not in resource:
         raise HTTPException(HTTPStatus.NOT_FOUND, f"Not found ({id_})")
 
 
-async def _get(resource: Dict[int, Place]) -> List[Place]:
-    return resource.values()
+def _check_field(field: str):
+    if field not in Place.model_fields:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, f"Unknown field ({field})")
+
+
+def _get(
+    resource: MutableMapping[int, Place],
+    sort: Optional[str] = None,
+    filters: Optional[List[str]] = None,
+    fields: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    with contextlib.nullcontext() if isinstance(resource, Places) else _LOCK:
+        places = [place.model_dump() for place in resource.values()]
+
+    for predicate in filters or []:
+        field, _, text = predicate.partition(":")
+        _check_field(field)
+        places = [place for place in places if text.lower() in str(place[field]).lower()]
+
+    if sort:
+        _check_field(field := sort.lstrip("-"))
+        places.sort(key=lambda place: place[field], reverse=sort.startswith("-"))
+
+    if fields:
+        for field in (columns := fields.split(",")):
+            _check_field(field)
+        places = [{column: place[column] for column in columns} for place in places]
+
+    return places
 
 
-async def _post(resource: Dict[int, Place], body: Place) -> Place:
-    if body.id in resource:
-        raise HTTPException(HTTPStatus.BAD_REQUEST, f"Exist already ({body.id})")
-    resource[body.id] = body
+def _quality(parameter: str) -> float:
+    try:
+        return float(parameter[2:])
+    except ValueError:  # a malformed quality does not accept
+        return 0
+
+
+def _accepts(header: str, token: str) -> bool:
+    """Whether an Accept(-Encoding) header lists the token without a zero quality"""
+    for part in header.split(","):
+        name, *parameters = [item.strip() for item in part.split(";")]
+        if name == token:
+            return all(_quality(p) > 0 for p in parameters if p.startswith("q="))
+    return False
+
+
+def _listing(request: Request, places: List[Dict[str, Any]]) -> Response:
+    if msgpack is not None and _accepts(request.headers.get("accept", ""), "application/msgpack"):
+        body, media_type = msgpack.packb(places), "application/msgpack"
+    else:
+        body, media_type = _JSONResponse(places).body, "application/json"
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encodings = request.headers.get("accept-encoding", "")
+    if COMPRESS_MIN_SIZE <= len(body):
+        if brotli is not None and _accepts(encodings, "br"):
+            body, headers["Content-Encoding"] = brotli.compress(body, quality=5), "br"
+        elif _accepts(encodings, "gzip"):
+            body, headers["Content-Encoding"] = gzip.compress(body, compresslevel=6), "gzip"
+    return Response(body, media_type=media_type, headers=headers)
+
+
+def _post(resource: MutableMapping[int, Place], body: Place) -> Place:
+    with _transaction(resource):
+        if body.id in resource:
+            raise HTTPException(HTTPStatus.BAD_REQUEST, f"Exist already ({body.id})")
+        resource[body.id] = body
     return body
 
 
-async def _read(resource: Dict[int, Place], id_: int) -> Place:
-    _check_exists(resource, id_)
-    return resource[id_]
+def _post_many(resource: MutableMapping[int, Place], body: List[Place]) -> List[Place]:
+    ids = [place.id for place in body]
+    with _transaction(resource):
+        if duplicates := sorted({id_ for id_ in ids if id_ in resource or 1 < ids.count(id_)}):
+            raise HTTPException(HTTPStatus.BAD_REQUEST, f"Exist already ({duplicates})")
+        resource.update(zip(ids, body))
+    return body
+
 
+def _read(resource: MutableMapping[int, Place], id_: int) -> Place:
+    try:
+        return resource[id_]
+    except KeyError as ex:
+        raise HTTPException(HTTPStatus.NOT_FOUND, f"Not found ({id_})") from ex
 
-async def _update(resource: Dict[int, Place], id_: int, body: Place) -> Place:
-    _check_exists(resource, id_)
+
+def _update(resource: MutableMapping[int, Place], id_: int, body: Place) -> Place:
     if id_ != body.id:
         raise HTTPException(HTTPStatus.BAD_REQUEST, f"Id's mismatch ({id_} != {body.id})")
-    resource[id_] = body
+    with _transaction(resource):
+        _check_exists(resource, id_)
+        resource[id_] = body
     return body
 
 
-async def _delete(resource: Dict[int, Place], id_: int) -> Place:
-    _check_exists(resource, id_)
-    result = resource[id_]
-    del resource[id_]
-    return result
+def _delete(resource: MutableMapping[int, Place], id_: int) -> Place:
+    with _transaction(resource):
+        _check_exists(resource, id_)
+        return resource.pop(id_)
+
+
+def _delete_many(resource: MutableMapping[int, Place], ids: List[int]) -> List[Place]:
+    with _transaction(resource):
+        for id_ in ids:
+            _check_exists(resource, id_)
+        return [resource.pop(id_) for id_ in dict.fromkeys(ids)]
+
+
+class Feed:
+    """Broadcasts the changes to the collections to the subscribed clients
+
+    With a SQLite file, the changes also pass through a table to reach the other workers' clients.
+    The handlers publish from the threadpool, the subscribers' queues are fed on the event loop.
+    """
+
+    RESET = json.dumps({"change": "reset"})
+
+    def __init__(self, path: Optional[str] = None, maxsize: int = 1000):
+        self._maxsize = maxsize
+        self._subscribers: List[asyncio.Queue] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()  # for the connection
+        self._connection = None
+        self._seq = 0  # the last change seen in the table
+        if path:
+            self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._connection.execute("PRAGMA busy_timeout=5000")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS changes"
+                " (seq INTEGER PRIMARY KEY AUTOINCREMENT, pid INTEGER, message TEXT)"
+            )
+            self._seq = self._connection.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+
+    def publish(self, resource: str, change: str, places: Union[Place, List[Place]]):
+        """Sends the changed places to the subscribers and returns the places"""
+        message = json.dumps(
+            {
+                "resource": resource,
+                "change": change,
+                "places": [
+                    place.model_dump()
+                    for place in (places if isinstance(places, list) else [places])
+                ],
+            }
+        )
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fan_out, message)
+        if self._connection is not None:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT INTO changes (pid, message) VALUES (?, ?)", (os.getpid(), message)
+                )
+        return places
+
+    def _fan_out(self, message: Optional[str]):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:  # instead of growing without limit
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(Feed.RESET if message is not None else None)
+
+    def close(self):
+        """Ends the subscriptions"""
+        self._fan_out(None)
+
+    def start(self):
+        """Feeds the subscribers on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+
+    def _changes(self, keep: int) -> List[str]:
+        """Returns the messages that the other worker processes published since the last call"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT seq, pid, message FROM changes WHERE seq > ? ORDER BY seq", (self._seq,)
+            ).fetchall()
+            if rows:
+                self._seq = rows[-1][0]
+                self._connection.execute("DELETE FROM changes WHERE seq <= ?", (self._seq - keep,))
+        return [message for _, pid, message in rows if pid != os.getpid()]
+
+    async def tail(self, interval: float = 0.1, keep: int = 10000):
+        """Fans out the changes that the other worker processes published"""
+        while True:
+            await asyncio.sleep(interval)
+            # the queries may wait on the other workers' writes, off the event loop
+            for message in await self._loop.run_in_executor(None, self._changes, keep):
+                self._fan_out(message)
+
+    async def subscribe(self, keep_alive: float = 15) -> AsyncIterator[str]:
+        """Yields the changes as server-sent events"""
+        queue = asyncio.Queue(self._maxsize)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), keep_alive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield f"data: {message}\n\n"
+        finally:
+            self._subscribers.remove(queue)
+
+
+if DB := os.environ.get("PSGA_DEMO_DB"):
+    TRAILS = Places(DB, "trails", TRAILS)
+    CITIES = Places(DB, "cities", CITIES)
+
+FEED = Feed(DB)
 
 
 # REST server
 
-app = FastAPI()
+
+@contextlib.asynccontextmanager
+async def _lifespan(_):
+    FEED.start()
+    tail = asyncio.create_task(FEED.tail()) if DB else None
+    yield
+    if tail is not None:
+        tail.cancel()
+
+
+app = FastAPI(lifespan=_lifespan, default_response_class=_JSONResponse)
 
 
-@app.get("/demo/trails", tags=["trails"])
-async def list_trails() -> List[Place]:
-    return await _get(TRAILS)
+@app.get("/demo/changes", tags=["changes"])
+async def follow_changes() -> StreamingResponse:
+    return StreamingResponse(FEED.subscribe(), media_type="text/event-stream")
+
+
+@app.get("/demo/trails", tags=["trails"], response_model=List[Dict[str, Any]])
+def list_trails(
+    request: Request,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+) -> Response:
+    return _listing(request, _get(TRAILS, sort, filters, fields))
 
 
 @app.post("/demo/trails", tags=["trails"])
-async def create_trail(body: Place) -> Place:
-    return await _post(TRAILS, body)
+def create_trail(body: Place) -> Place:
+    return FEED.publish("demo/trails", "created", _post(TRAILS, body))
+
+
+@app.post("/demo/trails/batch", tags=["trails"])
+def create_trails(body: List[Place]) -> List[Place]:
+    return FEED.publish("demo/trails", "created", _post_many(TRAILS, body))
+
+
+@app.delete("/demo/trails", tags=["trails"])
+def delete_trails(ids: List[int] = Query(alias="id")) -> List[Place]:
+    return FEED.publish("demo/trails", "deleted", _delete_many(TRAILS, ids))
 
 
 @app.get("/demo/trails/{id_}", tags=["trails"])
-async def read_trail(id_: int) -> Place:
-    return await _read(TRAILS, id_)
+def read_trail(id_: int) -> Place:
+    return _read(TRAILS, id_)
 
 
 @app.put("/demo/trails/{id_}", tags=["trails"])
-async def update_trail(id_: int, body: Place) -> Place:
-    return await _update(TRAILS, id_, body)
+def update_trail(id_: int, body: Place) -> Place:
+    return FEED.publish("demo/trails", "updated", _update(TRAILS, id_, body))
 
 
 @app.delete("/demo/trails/{id_}", tags=["trails"])
-async def delete_trail(id_: int) -> Place:
-    return await _delete(TRAILS, id_)
+def delete_trail(id_: int) -> Place:
+    return FEED.publish("demo/trails", "deleted", _delete(TRAILS, id_))
 
 
-@app.get("/demo/cities", tags=["cities"])
-async def list_cites() -> List[Place]:
-    return await _get(CITIES)
+@app.get("/demo/cities", tags=["cities"], response_model=List[Dict[str, Any]])
+def list_cites(
+    request: Request,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+) -> Response:
+    return _listing(request, _get(CITIES, sort, filters, fields))
 
 
 @app.post("/demo/cities", tags=["cities"])
-async def create_city(body: Place) -> Place:
-    return await _post(CITIES, body)
+def create_city(body: Place) -> Place:
+    return FEED.publish("demo/cities", "created", _post(CITIES, body))
+
+
+@app.post("/demo/cities/batch", tags=["cities"])
+def create_cities(body: List[Place]) -> List[Place]:
+    return FEED.publish("demo/cities", "created", _post_many(CITIES, body))
+
+
+@app.delete("/demo/cities", tags=["cities"])
+def delete_cities(ids: List[int] = Query(alias="id")) -> List[Place]:
+    return FEED.publish("demo/cities", "deleted", _delete_many(CITIES, ids))
 
 
 @app.get("/demo/cities/{id_}", tags=["cities"])
-async def read_city(id_: int) -> Place:
-    return await _read(CITIES, id_)
+def read_city(id_: int) -> Place:
+    return _read(CITIES, id_)
 
 
 @app.put("/demo/cities/{id_}", tags=["cities"])
-async def update_city(id_: int, body: Place) -> Place:
-    return await _update(CITIES, id_, body)
+def update_city(id_: int, body: Place) -> Place:
+    return FEED.publish("demo/cities", "updated", _update(CITIES, id_, body))
 
 
 @app.delete("/demo/cities/{id_}", tags=["cities"])
-async def delete_city(id_: int) -> Place:
-    return await _delete(CITIES, id_)
+def delete_city(id_: int) -> Place:
+    return FEED.publish("demo/cities", "deleted", _delete(CITIES, id_))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the demo REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--db", help="SQLite file shared by the workers (in-memory by default)")
+    args = parser.parse_args()
+
+    if args.db:
+        os.environ["PSGA_DEMO_DB"] = args.db  # the workers import this module anew
+    elif 1 < args.workers:
+        parser.error("multiple workers share their data through --db")
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    config = _Config(
+        "rest:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+        timeout_graceful_shutdown=1,  # the change feed's responses never end
+    )
+    server = uvicorn.Server(config)
+    if 1 < args.workers:  # as uvicorn.run, with the TCP socket
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
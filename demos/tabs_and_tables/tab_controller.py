@@ -4,7 +4,8 @@
 
 # pylint: disable=import-error
 
-from typing import List
+import functools
+from typing import Dict, List, Optional
 
 import PySimpleGUI as sg
 from model import Model
@@ -19,23 +20,67 @@ class TabController(psga.Controller):
     def __init__(
         self,
         dispatcher: psga.Dispatcher,
-        window: sg.Window,
+        view: psga.ViewState,
+        store: psga.Store,
         model: Model,
         resource: str,
         table_name: str,
         headings=List[str],
     ):
         super().__init__(dispatcher)
-        self._window = window
+        self._view = view  # PSGA: the element updates of one event reach Tk once, after the event
         self._model = model
         self.resource = resource
         self.table_name = table_name
         self.headings = headings
+        self.sort_key: Optional[str] = None  # a heading, prefixed with "-" for descending order
+        self.filters: Dict[str, str] = {}  # heading -> text the column should contain
+        self.selected: List[str] = []  # the ids of the selected rows
+        self._reselect = False  # the restored selection awaits the data
         self._data = []
 
+        # PSGA: the store keeps an item and its table row per id, the table is bound to the rows
+        # PSGA: a changed item only rebuilds its own row, unchanged data does not reach Tk
+        self._store = store
+        self._ids: List[str] = []
+        store.derive(
+            (resource, "rows"),
+            lambda store: [store.get((resource, id_, "row")) for id_ in store.get(resource, [])],
+        )
+        store.bind((resource, "rows"), table_name, "values")
+
+    def _row(self, id_: str, store: psga.Store) -> List:
+        item = store.get((self.resource, id_))
+        return [item.get(heading, "") for heading in self.headings]
+
+    def get_state(self) -> Dict:
+        """the query and the selection survive a restart"""
+        return {"sort_key": self.sort_key, "filters": self.filters, "selected": self.selected}
+
+    def set_state(self, state: Dict):
+        """restore the query and the selection"""
+        self.sort_key, self.filters = state["sort_key"], state["filters"]
+        self.selected, self._reselect = state["selected"], True
+
+    def select(self, indices: List[int]):
+        """remember the ids of the selected rows"""
+        self.selected = [self._ids[index] for index in indices if index < len(self._ids)]
+
     def refresh(self):
         """trigger a data model fetch"""
-        self._model.read(self.resource)
+        self._model.read(self.resource, self.sort_key, self.filters, self.headings)
+
+    def query(self, sort_key: Optional[str] = None, filters: Optional[Dict[str, str]] = None):
+        """let the server sort and filter the table's data"""
+        self.sort_key = sort_key
+        self.filters = filters or {}
+        self.refresh()
+
+    def sort_on(self, column: int):
+        """sort on the column's heading, toggles the order on a repeated click"""
+        if 0 <= column < len(self.headings):
+            heading = self.headings[column]
+            self.query("-" + heading if self.sort_key == heading else heading, self.filters)
 
     def on_data_handler(self, value):
         """handle the data in the REST response"""
@@ -52,12 +97,20 @@ class TabController(psga.Controller):
             sg.popup(f"{value}", title="Error", keep_on_top=True)
         else:
             self._data = value
-            data = (
-                map(lambda i: [i.get(e, "") for e in self.headings], self._data)
-                if self._data
-                else []
-            )
-            self._window[self.table_name].update(values=data)
+            ids = [str(item.get("id")) for item in value]
+            for id_ in set(self._ids).difference(ids):
+                self._store.delete((self.resource, id_, "row"))
+                self._store.delete((self.resource, id_))
+            for id_ in set(ids).difference(self._ids):
+                self._store.derive((self.resource, id_, "row"), functools.partial(self._row, id_))
+            for id_, item in zip(ids, value):
+                self._store.set((self.resource, id_), item)
+            self._store.set(self.resource, ids)
+            self._ids = ids
+            if self._reselect:  # PSGA: the view applies the store's rows before the selection
+                self._reselect = False
+                rows = [index for index, id_ in enumerate(ids) if id_ in self.selected]
+                self._view[self.table_name].update(select_rows=rows)
 
     def create_dialog(self, title: str):
         """input and confirm a new model data"""
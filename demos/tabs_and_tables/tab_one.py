@@ -18,17 +18,25 @@ class TabOneCtr(TabController):
 
     headings = ["id", "name", "location", "description"]
 
-    def __init__(self, dispatcher: psga.Dispatcher, window: sg.Window, model: Model):
+    def __init__(
+        self,
+        dispatcher: psga.Dispatcher,
+        view: psga.ViewState,
+        store: psga.Store,
+        model: Model,
+    ):
         super().__init__(
             dispatcher,
-            window,
+            view,
+            store,
             model,
             TabOneCtr._on_data.name,
             TabOneCtr._on_table_click.name,
             TabOneCtr.headings,
         )
 
-    @psga.action()
+    # PSGA: a stable name, the snapshot saves the selected tab's key
+    @psga.action(name="-TAB TRAILS-")
     def on_tab(self, _):
         """refresh the data"""
         self.refresh()
@@ -50,15 +58,21 @@ class TabOneCtr(TabController):
             f"!Delete…::{self._on_delete.name}",
         ]
         indices = values[self.table_name]
+        self.select(indices)  # PSGA: a snapshot restores the selection
         if 0 == len(indices):
             menu_indices = [2]
-        elif 1 == len(indices):
+        else:  # one or many rows are copied or deleted
             menu_indices = [0, 2, 3]
-        else:
-            menu_indices = [0, 2]
         for index in menu_indices:
             menus[index] = menus[index][1:]
-        self._window[self.table_name].set_right_click_menu(["", [menus]])
+        self._view[self.table_name].set_right_click_menu(["", [menus]])
+
+    # PSGA: a click on a heading is a ("table key", "+CLICKED+", (-1, column)) event
+    # PSGA: the heading pattern routes it here instead of to the table's _on_table_click handler
+    @psga.action(patterns=[psga.heading(_on_table_click.name)], with_event=True)
+    def _on_heading_click(self, _, event):
+        _, _, (_, column) = event
+        self.sort_on(column)  # the server sorts the data on the clicked column
 
     @psga.action()
     def _on_copy(self, values):
@@ -82,6 +96,11 @@ class TabOneCtr(TabController):
             selection = self._data[indices[0]]
             if (result := self.delete_dialog("Delete this trail?", selection)) is not None:
                 self._model.delete(self._on_data.name, result)
+        elif 1 < len(indices):
+            # a single request removes all selected trails
+            if "OK" == sg.popup_ok_cancel(f"Delete these {len(indices)} trails?", keep_on_top=True):
+                ids = [self._data[index]["id"] for index in indices]
+                self._model.delete_many(self._on_data.name, ids)
 
     @staticmethod
     def layout() -> sg.Element:
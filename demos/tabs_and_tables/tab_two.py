@@ -18,17 +18,25 @@ class TabTwoCtr(TabController):
 
     headings = ["id", "name", "location", "description"]
 
-    def __init__(self, dispatcher: psga.Dispatcher, window: sg.Window, model: Model):
+    def __init__(
+        self,
+        dispatcher: psga.Dispatcher,
+        view: psga.ViewState,
+        store: psga.Store,
+        model: Model,
+    ):
         super().__init__(
             dispatcher,
-            window,
+            view,
+            store,
             model,
             TabTwoCtr._on_data.name,
             TabTwoCtr._on_table_click.name,
             self.headings,
         )
 
-    @psga.action()
+    # PSGA: a stable name, the snapshot saves the selected tab's key
+    @psga.action(name="-TAB CITIES-")
     def on_tab(self, _):
         """refresh the data"""
         self.refresh()
@@ -46,6 +54,7 @@ class TabTwoCtr(TabController):
             f"!Delete…::{self._on_delete.name}",
         ]
         indices = values[self.table_name]
+        self.select(indices)  # PSGA: a snapshot restores the selection
         if 0 == len(indices):
             menu_indices = [2]
         elif 1 == len(indices):
@@ -54,7 +63,14 @@ class TabTwoCtr(TabController):
             menu_indices = [0, 2]
         for index in menu_indices:
             menus[index] = menus[index][1:]
-        self._window[self.table_name].set_right_click_menu(["", [menus]])
+        self._view[self.table_name].set_right_click_menu(["", [menus]])
+
+    # PSGA: a click on a heading is a ("table key", "+CLICKED+", (-1, column)) event
+    # PSGA: the heading pattern routes it here instead of to the table's _on_table_click handler
+    @psga.action(patterns=[psga.heading(_on_table_click.name)], with_event=True)
+    def _on_heading_click(self, _, event):
+        _, _, (_, column) = event
+        self.sort_on(column)  # the server sorts the data on the clicked column
 
     @psga.action()
     def _on_copy(self, values):
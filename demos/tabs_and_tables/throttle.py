@@ -0,0 +1,156 @@
+# Copyright 2024 Francis Meyvis <psga@mikmak.fun>
+
+"""A request scheduler that keeps the model's REST requests within each host's limits"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests import Request, Session
+
+# pylint: disable=too-few-public-methods
+
+
+class _TokenBucket:
+    """Allows rate requests per second on average and bursts of up to capacity requests"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float]):
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._time = clock()
+
+    def take(self) -> float:
+        """Takes a token and returns 0, else returns the seconds till the next token"""
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._time) * self._rate)
+        self._time = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self._rate
+
+
+class _Queued:
+    def __init__(self, events, key: str, request: Request, cookie: Any, stale: Hashable):
+        self.events = events
+        self.key = key
+        self.request = request
+        self.cookie = cookie
+        self.stale = stale
+        self.cancelled = False
+
+
+class _Host:
+    """The queued requests of a host and the worker threads that send them"""
+
+    def __init__(self, bucket: _TokenBucket):
+        self.bucket = bucket
+        self.queue: List[Tuple[int, int, _Queued]] = []  # a heap on (priority, order)
+        self.reads: Dict[Hashable, _Queued] = {}  # the queued read per stale key
+        self.workers = 0
+        self.in_flight = 0
+
+
+class RequestScheduler:
+    """Sends the model's requests from a few worker threads per host
+
+    Per host, at most concurrency requests are in flight and a token bucket allows rate
+    requests per second on average, in bursts of up to burst requests.
+    The user-initiated writes go before the queued background reads.
+    A read that a newer read of the same stale key (e.g. the resource) replaces
+    is cancelled while still queued, it sends no request and writes no event.
+    Each worker thread reuses its own session's connections.
+    """
+
+    WRITE, READ = 0, 1  # the priorities
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        rate: float = 20,
+        burst: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+        session: Callable[[], Session] = Session,
+    ):
+        self._concurrency = concurrency
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._session = session  # creates a worker's session
+        self._condition = threading.Condition()
+        self._hosts: Dict[str, _Host] = {}
+        self._order = itertools.count()
+        self.sent = self.cancelled = 0
+
+    def submit(
+        self,
+        events,
+        key: str,
+        request: Request,
+        cookie: Any,
+        priority: int = READ,
+        stale: Optional[Hashable] = None,
+    ):
+        """Queues the request, its worker writes the event key with (response, cookie)
+
+        The response is an exception when the request failed.
+        """
+        host_name = urlsplit(request.url).netloc
+        queued = _Queued(events, key, request, cookie, stale)
+        with self._condition:
+            if (host := self._hosts.get(host_name)) is None:
+                bucket = _TokenBucket(self._rate, self._burst, self._clock)
+                host = self._hosts[host_name] = _Host(bucket)
+            if stale is not None:
+                if (replaced := host.reads.get(stale)) is not None:
+                    replaced.cancelled = True
+                    self.cancelled += 1
+                host.reads[stale] = queued
+            heapq.heappush(host.queue, (priority, next(self._order), queued))
+            if host.workers < min(self._concurrency, len(host.queue) + host.in_flight):
+                host.workers += 1
+                threading.Thread(target=self._work, args=(host,), daemon=True).start()
+            self._condition.notify_all()
+
+    def _next(self, host: _Host) -> _Queued:
+        """Waits for the host's next request that is not cancelled and a token to send it"""
+        with self._condition:
+            while True:
+                while host.queue and host.queue[0][2].cancelled:
+                    heapq.heappop(host.queue)
+                if not host.queue:
+                    self._condition.wait()
+                elif (delay := host.bucket.take()) > 0:
+                    self._condition.wait(delay)
+                else:
+                    queued = heapq.heappop(host.queue)[2]
+                    if host.reads.get(queued.stale) is queued:
+                        del host.reads[queued.stale]  # a newer read no longer cancels it
+                    host.in_flight += 1
+                    self.sent += 1
+                    return queued
+
+    def _work(self, host: _Host):
+        try:
+            with self._session() as session:
+                while True:
+                    queued = self._next(host)
+                    try:
+                        response = session.send(session.prepare_request(queued.request))
+                        response.raise_for_status()
+                    except Exception as ex:  # pylint: disable=broad-exception-caught
+                        response = ex  # e.g. an invalid request's error, its handler reports it
+                    finally:
+                        with self._condition:
+                            host.in_flight -= 1
+                            self._condition.notify_all()
+                    # an EventChannel holds back this thread while the event loop falls behind
+                    queued.events.write_event_value(queued.key, (response, queued.cookie))
+        finally:  # e.g. the events' window closed, a later submit starts another worker
+            with self._condition:
+                host.workers -= 1
@@ -2,13 +2,47 @@
 
 """Minimalistic Controller (as in the MVC paradigm) for PySimpleGUI."""
 
+# pylint: disable=too-many-lines
+
+import collections
+import datetime
+import dis
+import enum
 import functools
+import heapq
+import inspect
+import json
 import logging
-from typing import Callable, Dict, Hashable, List, Optional, Protocol
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
 
 import PySimpleGUI as sg
 from typing_extensions import Self
 
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
 
 class Action(Protocol):
     """Bundles the event's name and handler"""
@@ -17,13 +51,25 @@ class Action(Protocol):
 
     name: str
     keys: Optional[List[Hashable]]
+    patterns: Optional[List[Hashable]]
+    with_event: bool
 
-    def __call__(self, values=None):
+    def __call__(self, values=None, event=None):
         """"""
 
 
-def action(name: Optional[str] = None, keys: Optional[List[Hashable]] = None):
-    """Turns an event handler into an action using given name as event's name"""
+def action(
+    name: Optional[str] = None,
+    keys: Optional[List[Hashable]] = None,
+    patterns: Optional[List[Hashable]] = None,
+    with_event: bool = False,
+):
+    """Turns an event handler into an action using given name as event's name
+
+    The handler is also invoked for events that have no exactly matching handler
+    but that match one of the given patterns (see Wildcard).
+    With with_event, the handler also gets the event, e.g. a table click's (row, column).
+    """
     # pylint: disable=protected-access
 
     action._counter = getattr(action, "_counter", 0) + 1
@@ -37,40 +83,294 @@ def action(name: Optional[str] = None, keys: Optional[List[Hashable]] = None):
             handler.__name__ + "_" + str(action._counter) if name is None else name
         )
         _wrapper_action.keys = keys
+        _wrapper_action.patterns = patterns
+        _wrapper_action.with_event = with_event
 
         return _wrapper_action
 
     return _decorator_action
 
 
+class Wildcard(enum.Enum):
+    r"""Wildcards in the patterns of an action
+
+    A pattern string uses "?" and "*" (e.g. "-ROW-*" or "-ROW-?-"), a backslash matches
+    the next character literally (e.g. r"-ROW\*-*" matches "-ROW*-1");
+    a pattern tuple uses ANY for an element (e.g. ("-TABLE-", "+CLICKED+", (ANY, 2))),
+    its strings match literally.
+    """
+
+    ANY = "?"  # matches one character of a string or one element of a tuple
+    STAR = "*"  # matches any number of characters of a string
+
+
+ANY = Wildcard.ANY
+
+
+def cell(table_key: Hashable, row=ANY, column=ANY) -> tuple:
+    """Returns the event (pattern) for a click on a table's cell; a heading's row is -1"""
+    return (table_key, sg.TABLE_CLICKED_INDICATOR, (row, column))
+
+
+def heading(table_key: Hashable, column=ANY) -> tuple:
+    """Returns the event (pattern) for a click on a table's column heading"""
+    return cell(table_key, -1, column)
+
+
+_BEGIN, _END = object(), object()  # delimit a tuple's elements in the tokens
+
+
+def _tokenize(key: Hashable, pattern: bool = False) -> Tuple[list, List[int]]:
+    """Returns the key's tokens and for each token the index after its element"""
+    tokens, ends = [], []
+
+    def _add(element, top: bool):
+        if isinstance(element, tuple):
+            begin = len(tokens)
+            tokens.append(_BEGIN)
+            ends.append(0)
+            for item in element:
+                _add(item, False)
+            tokens.append(_END)
+            ends.append(len(tokens))
+            ends[begin] = len(tokens)
+        elif top and isinstance(element, str):  # a (top level) string matches per character
+            chars = iter(element)
+            for char in chars:
+                if pattern and "\\" == char:  # the next character is not a wildcard
+                    char = next(chars, char)
+                elif pattern and char in "?*":
+                    char = Wildcard(char)
+                tokens.append(char)
+                ends.append(len(tokens))
+        else:
+            tokens.append(element)
+            ends.append(len(tokens))
+
+    _add(key, True)
+    return tokens, ends
+
+
+class _Trie:
+    """Matches a key to the patterns in a prefix tree; the cost grows with the key's depth"""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.children: Dict[Hashable, "_Trie"] = {}
+        self.handlers: List[Tuple[int, Action]] = []  # with their registration order
+
+    def insert(self, pattern: Hashable, handler: Action, order: int):
+        """Adds the handler for given pattern"""
+        node = self
+        for token in _tokenize(pattern, True)[0]:
+            node = node.children.setdefault(token, _Trie())
+        node.handlers.append((order, handler))
+
+    def match(self, key: Hashable) -> List[Action]:
+        """Returns the handlers of all patterns matching given key"""
+        tokens, ends = _tokenize(key)
+        found, stack, seen = [], [(self, 0)], set()
+        while stack:
+            if (state := stack.pop()) in seen:
+                continue
+            seen.add(state)
+            node, index = state
+            if len(tokens) == index:
+                found.extend(node.handlers)
+            else:
+                if (child := node.children.get(tokens[index])) is not None:
+                    stack.append((child, index + 1))
+                if (child := node.children.get(Wildcard.ANY)) is not None and tokens[
+                    index
+                ] is not _END:
+                    stack.append((child, ends[index]))
+            if (child := node.children.get(Wildcard.STAR)) is not None:
+                position = index  # matches nothing, one element, two elements...
+                while True:
+                    stack.append((child, position))
+                    if len(tokens) == position or tokens[position] is _END:
+                        break
+                    position = ends[position]
+        found.sort(key=lambda found: found[0])
+        return list({id(handler): handler for _, handler in found}.values())
+
+
+class ActionGraph(NamedTuple):
+    """The result of Dispatcher.compile"""
+
+    table: Mapping[Hashable, Tuple[Action, ...]]  # the window's events and their handlers
+    unhandled: List[Hashable]  # the window's events without a handler
+    dead: List[Hashable]  # the handlers' names and keys that the window does not generate
+
+
+_EVENT_BUTTONS = {
+    sg.BUTTON_TYPE_READ_FORM,
+    sg.BUTTON_TYPE_CLOSES_WIN,
+    sg.BUTTON_TYPE_CLOSES_WIN_ONLY,
+    sg.BUTTON_TYPE_REALTIME,
+}
+
+
+def _menu_events(menu) -> List[str]:
+    """Returns the events of a menu definition's items (as if enabled)"""
+    events = []
+    for index, item in enumerate(menu or []):
+        if isinstance(item, (list, tuple)):
+            events.extend(_menu_events(item))
+        elif index + 1 < len(menu) and isinstance(menu[index + 1], (list, tuple)):
+            pass  # the title of the (sub) menu that follows
+        elif isinstance(item, str) and "---" != item:
+            shortcut = item.find(sg.MENU_SHORTCUT_CHARACTER)
+            if -1 != shortcut and (0 == shortcut or "\\" != item[shortcut - 1]):
+                item = item[:shortcut] + item[shortcut + len(sg.MENU_SHORTCUT_CHARACTER) :]
+            disabled = item.startswith(sg.MENU_DISABLED_CHARACTER)
+            events.append(item[len(sg.MENU_DISABLED_CHARACTER) :] if disabled else item)
+    return events
+
+
+def _window_events(window: sg.Window) -> List[Hashable]:
+    """Returns the events that the window's elements, menus and bindings generate"""
+    events = list(window.user_bind_dict.values()) + _menu_events(window.RightClickMenu)
+    for element in window.element_list():
+        key = element.Key
+        if isinstance(element, sg.Menu):
+            events.extend(_menu_events(element.MenuDefinition))
+        elif (
+            isinstance(element, sg.ButtonMenu)
+            or (isinstance(element, sg.Button) and element.BType in _EVENT_BUTTONS)
+            or getattr(element, "ChangeSubmits", False)
+            or getattr(element, "enable_click_events", False)  # e.g. a table's clicks
+        ):
+            events.append(key)
+        events.extend(_menu_events(getattr(element, "RightClickMenu", None)))
+        for modifier in element.user_bind_dict.values():
+            events.append(key + str(modifier) if isinstance(key, str) else (key, modifier))
+    return events
+
+
 class Dispatcher:
     """Dispatcher an event's values to a matching handler."""
 
     def __init__(self):
         self._handlers: Dict[str, Action] = {}
+        self._patterns = _Trie()
+        self._pattern_count = 0
+        self._after_dispatch: List[Callable[[], None]] = []
+        self._dispatching = 0  # the after_dispatch callbacks that dispatch events come first
+        self._before_read: List[Callable[[], Optional[Tuple[int, Hashable]]]] = []
+        self._compiled: Dict[Hashable, Tuple[Action, ...]] = {}
 
     def register(self, handler: Action) -> Self:
-        """Registers given action's handler by its name and keys."""
+        """Registers given action's handler by its name, keys and patterns."""
+        self._compiled = {}
         self._handlers.setdefault(handler.name, []).append(handler)
         if handler.keys is not None:
             for key in handler.keys:
                 self._handlers.setdefault(key, []).append(handler)
+        for pattern in getattr(handler, "patterns", None) or []:
+            self._pattern_count += 1
+            self._patterns.insert(pattern, handler, self._pattern_count)
         return self
 
-    def dispatch(self, event, values) -> bool:
-        """Returns True if a handler was found and invoked for given event."""
-        if isinstance(event, tuple):
-            # TODO are there other type of "tuple"-events?
-            name = event[0] if "+CLICKED+" == event[1] else None
+    def handlers(self) -> List[Action]:
+        """Returns the registered handlers, each once"""
+        return list(
+            {
+                id(handler): handler for handlers in self._handlers.values() for handler in handlers
+            }.values()
+        )
+
+    def after_dispatch(self, callback: Callable[[], None], dispatches: bool = False) -> Self:
+        """Registers a callback that the loop invokes after each event (e.g. ViewState.flush)
+
+        A callback that dispatches events (e.g. Scheduler.run) runs before those that do not,
+        these then flush the changes of its handlers in the same iteration.
+        """
+        if dispatches:
+            self._after_dispatch.insert(self._dispatching, callback)
+            self._dispatching += 1
         else:
-            if 2 == len(menu_event := event.rsplit(sg.MENU_KEY_SEPARATOR, 1)):
-                _, name = menu_event  # extract the key from a menu-item event having a name
-            else:
-                name = event
+            self._after_dispatch.append(callback)
+        return self
 
+    def before_read(self, callback: Callable[[], Optional[Tuple[int, Hashable]]]) -> Self:
+        """Registers a callback returning the (timeout_ms, timeout_key) for the loop's next read
+
+        or None (e.g. Scheduler.timeout). The read uses the earliest timeout.
+        """
+        self._before_read.append(callback)
+        return self
+
+    def _match(self, name) -> Optional[List[Action]]:
+        """Returns the exactly matching handlers, else those of the matching patterns"""
         if (handlers := self._handlers.get(name, None)) is not None:
+            return handlers
+        if self._pattern_count and (handlers := self._patterns.match(name)):
+            return handlers
+        return None
+
+    def _resolve(self, event) -> Optional[List[Action]]:
+        """Returns the handlers for given event
+
+        A table click event matches the handlers of the whole (key, "+CLICKED+", (row, column))
+        tuple, else those of the table's key.
+        """
+        if isinstance(event, tuple):
+            handlers = self._match(event)
+            if handlers is None and 1 < len(event) and sg.TABLE_CLICKED_INDICATOR == event[1]:
+                handlers = self._match(event[0])
+            return handlers
+        if isinstance(event, str) and 2 == len(
+            menu_event := event.rsplit(sg.MENU_KEY_SEPARATOR, 1)
+        ):
+            _, event = menu_event  # extract the key from a menu-item event having a name
+        return self._match(event)  # e.g. an int key
+
+    def compile(self, window: sg.Window, events: Optional[List[Hashable]] = None) -> "ActionGraph":
+        """Resolves the handlers of the events of the window's elements, menus and bindings once
+
+        The dispatcher then looks these events up without parsing them. Compile after registering
+        the handlers (registering clears the table). The given events (e.g. written by threads)
+        do not count as dead keys.
+        """
+        generated = list(dict.fromkeys(_window_events(window)))
+        table, unhandled = {}, []
+        for event in generated:
+            if (handlers := self._resolve(event)) is None:
+                unhandled.append(event)
+            else:
+                table[event] = tuple(handlers)
+        self._compiled = table
+
+        known = set(events or [])
+        for event in generated:
+            known.add(event)
+            if isinstance(event, str) and sg.MENU_KEY_SEPARATOR in event:
+                known.add(event.rsplit(sg.MENU_KEY_SEPARATOR, 1)[1])
+        by_patterns = {
+            handler.name for handler in self.handlers() if getattr(handler, "patterns", None)
+        }
+        dead = [key for key in self._handlers if key not in known and key not in by_patterns]
+
+        log = logging.getLogger("PSGA")
+        if unhandled:
+            log.warning("Unhandled keys: %s", unhandled)
+        if dead:
+            log.info("Keys without an element, menu item or binding: %s", dead)
+        return ActionGraph(types.MappingProxyType(table), unhandled, dead)
+
+    def dispatch(self, event, values) -> bool:
+        """Returns True if a handler was found and invoked for given event."""
+        if (handlers := self._compiled.get(event)) is None:
+            handlers = self._resolve(event)
+
+        if handlers is not None:
             for handler in handlers:
-                handler(values)
+                if getattr(handler, "with_event", False):
+                    handler(values, event)
+                else:
+                    handler(values)
             return True
         return False
 
@@ -78,16 +378,23 @@ class Dispatcher:
         """Process window's events and values until the Exit event or given timeout"""
         log = logging.getLogger("PSGA")
         while True:
-            event, values = window.read(timeout_ms, timeout_key)
+            timeout = (timeout_ms, timeout_key)
+            for callback in self._before_read:
+                if (earlier := callback()) is not None and (
+                    timeout[0] is None or earlier[0] < timeout[0]
+                ):
+                    timeout = earlier
+            event, values = window.read(*timeout)
             log.debug("event %s, values: %s", event, values)
 
             if event in {sg.WIN_CLOSED, "Exit"}:
                 break
 
-            if self.dispatch(event, values):
-                continue
+            if not self.dispatch(event, values):
+                log.warning("Unhandled event: %s", event)
 
-            log.warning("Unhandled event: %s", event)
+            for callback in self._after_dispatch:
+                callback()
 
 
 class Controller:
@@ -103,3 +410,759 @@ class Controller:
             if callable(func) and hasattr(func, "name")
         ]:
             dispatcher.register(method)
+
+    def get_state(self) -> Any:
+        """Returns the state to snapshot (dicts, lists, strings, numbers, ...), None for none"""
+        return None
+
+    def set_state(self, state: Any):
+        """Restores a snapshot's state"""
+
+
+class ViewState:
+    """Batches the calls on a window's elements until the Dispatcher's loop flushes them
+
+    Use view[key].update(...) instead of window[key].update(...) (any element method without
+    a result). An element's repeated updates collapse into one update per loop iteration:
+    their arguments merge by name and the last ones win. An update with append=True
+    and the other methods' calls are applied in order; an update after them is not merged
+    into the ones before them.
+    """
+
+    _VARIADIC = (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+
+    def __init__(self, dispatcher: Dispatcher, window: sg.Window):
+        self._window = window
+        self._calls: List[Tuple[Hashable, str, tuple, dict]] = []
+        self._updates: Dict[Hashable, int] = {}  # the index of an element's mergeable update
+        self._signatures: Dict[Hashable, inspect.Signature] = {}
+        self._before_flush: List[Callable[[], None]] = []
+        dispatcher.after_dispatch(self.flush)
+
+    def __getitem__(self, key: Hashable) -> "_ElementState":
+        return _ElementState(self, key)
+
+    def _arguments(self, key: Hashable, args: tuple, kwargs: dict) -> Optional[dict]:
+        """Returns the update's arguments by name, None when these do not merge"""
+        if (signature := self._signatures.get(key)) is None:
+            signature = self._signatures[key] = inspect.signature(self._window[key].update)
+        try:
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+        except TypeError:
+            return None
+        if arguments.get("append") or any(
+            signature.parameters[name].kind in self._VARIADIC for name in arguments
+        ):
+            return None
+        return dict(arguments)
+
+    def call(self, key: Hashable, method: str, /, *args, **kwargs):
+        """Schedules a call of the method of the element with given key"""
+        if "update" == method and (arguments := self._arguments(key, args, kwargs)) is not None:
+            if (index := self._updates.get(key)) is not None:
+                self._calls[index][3].update(arguments)
+            else:
+                self._updates[key] = len(self._calls)
+                self._calls.append((key, method, (), arguments))
+        else:
+            self._updates.pop(key, None)  # a later update follows this call
+            self._calls.append((key, method, args, kwargs))
+
+    def before_flush(self, callback: Callable[[], None]) -> Self:
+        """Registers a callback that schedules its calls before each flush (e.g. Store.flush)"""
+        self._before_flush.append(callback)
+        return self
+
+    def flush(self):
+        """Applies the scheduled calls to the window's elements, in order"""
+        for callback in self._before_flush:
+            callback()
+        calls, self._calls, self._updates = self._calls, [], {}
+        for key, method, args, kwargs in calls:
+            getattr(self._window[key], method)(*args, **kwargs)
+
+
+class _ElementState:
+    """Schedules the calls of an element's methods in its ViewState (or a worker's window)"""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, view: ViewState, key: Hashable):
+        self._view = view
+        self._key = key
+
+    def __getattr__(self, method: str) -> Callable:
+        return functools.partial(self._view.call, self._key, method)
+
+
+class Store:
+    """Observable values and lazily computed, memoized derived values, bound to elements by key
+
+    A derived value remembers the values it reads; setting one of these invalidates it.
+    It is recomputed when read again (e.g. a table's rows from its row values,
+    each row from its item). After each event, the Dispatcher's loop updates the elements
+    bound to invalidated values, and only when their value changed.
+    Given a ViewState instead of the window, the store's updates merge with the view's
+    (e.g. a table's values and its select_rows) before the view flushes them.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, dispatcher: Dispatcher, window: Union[sg.Window, ViewState]):
+        self._window = window
+        self._values: Dict[Hashable, Any] = {}  # without the invalidated derived values
+        self._computes: Dict[Hashable, Callable[["Store"], Any]] = {}
+        self._dependencies: Dict[Hashable, set] = {}  # derived key -> keys it read
+        self._dependents: Dict[Hashable, set] = collections.defaultdict(set)
+        self._reading: List[set] = []  # the keys read by the derived values being computed
+        self._bindings: Dict[Hashable, List[Tuple[Hashable, str]]] = {}
+        self._changed: Dict[Hashable, None] = {}  # bound keys to update, in order
+        self._applied: Dict[Tuple[Hashable, str], Any] = {}  # the elements' last values
+        if isinstance(window, ViewState):
+            window.before_flush(self.flush)
+        else:
+            dispatcher.after_dispatch(self.flush)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the key's (derived) value, a dependency of the derived value being computed"""
+        if self._reading:
+            self._reading[-1].add(key)
+        if key in self._computes and key not in self._values:
+            self._compute(key)
+        return self._values.get(key, default)
+
+    def set(self, key: Hashable, value: Any):
+        """Sets the key's value, invalidates its dependents if it changed"""
+        if key not in self._values or self._values[key] != value:
+            self._values[key] = value
+            self._invalidate(key)
+
+    def delete(self, key: Hashable):
+        """Removes the key's (derived) value and bindings, and invalidates its dependents"""
+        self._computes.pop(key, None)
+        self._values.pop(key, None)
+        self._invalidate(key)
+        self._forget(key)
+        self._dependents.pop(key, None)  # these read it again when they are recomputed
+        for binding in self._bindings.pop(key, ()):
+            self._applied.pop(binding, None)
+        self._changed.pop(key, None)
+
+    def derive(self, key: Hashable, compute: Callable[["Store"], Any]):
+        """Defines the key's value as computed from the values that compute gets from the store"""
+        self._computes[key] = compute
+        self._values.pop(key, None)
+        self._invalidate(key)
+
+    def bind(self, key: Hashable, element_key: Hashable, argument: str = "value"):
+        """Updates the element with the key's value, e.g. bind(key, table_key, "values")"""
+        self._bindings.setdefault(key, []).append((element_key, argument))
+        self._changed[key] = None
+
+    def _forget(self, key: Hashable):
+        """Removes the derived key from the dependents of the keys it read"""
+        for dependency in self._dependencies.pop(key, ()):
+            if (dependents := self._dependents.get(dependency)) is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def _compute(self, key: Hashable):
+        self._forget(key)
+        self._reading.append(dependencies := set())
+        try:
+            self._values[key] = self._computes[key](self)
+        finally:
+            self._reading.pop()
+        for dependency in dependencies:
+            self._dependents[dependency].add(key)
+        self._dependencies[key] = dependencies
+
+    def _invalidate(self, key: Hashable):
+        stack = [key]
+        while stack:
+            if (key := stack.pop()) in self._bindings:
+                self._changed[key] = None
+            for dependent in self._dependents.get(key, ()):
+                if dependent in self._values:  # else it and its dependents are invalid already
+                    del self._values[dependent]
+                    stack.append(dependent)
+
+    def flush(self):
+        """Updates the elements bound to the changed values"""
+        changed, self._changed = self._changed, {}
+        for key in changed:
+            value = self.get(key)
+            for binding in self._bindings[key]:
+                if binding in self._applied and value == self._applied[binding]:
+                    continue
+                self._applied[binding] = value
+                element_key, argument = binding
+                self._window[element_key].update(**{argument: value})
+
+
+class _RemoteWindow:
+    """A worker process' stand-in for the GUI's sg.Window
+
+    Its loop reads the events that the GUI forwards; the element calls of an event
+    and the written events go back to the GUI.
+    """
+
+    def __init__(self, events, results):
+        self._events = events
+        self._results = results
+        self._calls = []
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: Hashable) -> _ElementState:
+        return _ElementState(self, key)
+
+    def call(self, key: Hashable, method: str, /, *args, **kwargs):
+        """Records a call of the method of the GUI's element with given key"""
+        with self._lock:
+            self._calls.append((key, method, args, kwargs))
+
+    def write_event_value(self, key: Hashable, value: Any):
+        """Sends an event to the GUI's window, after the element calls so far"""
+        with self._lock:
+            self._send_calls()
+            self._results.send((key, value))
+
+    def _send_calls(self):
+        if self._calls:
+            self._results.send(self._calls)
+            self._calls = []
+
+    def read(self, timeout_ms=None, timeout_key=sg.TIMEOUT_KEY):
+        """Returns the next forwarded event, after sending the element calls of the previous"""
+        with self._lock:
+            self._send_calls()
+        try:
+            if not self._events.poll(None if timeout_ms is None else timeout_ms / 1000):
+                return timeout_key, {}
+            if (message := self._events.recv()) is not None:
+                return message
+        except EOFError:  # the GUI's process ended
+            pass
+        return sg.WIN_CLOSED, None
+
+
+def _serve(events, results, setup: Callable[[Dispatcher, _RemoteWindow], Any]):
+    """Runs the worker process' own dispatcher loop"""
+    window = _RemoteWindow(events, results)
+    setup(dispatcher := Dispatcher(), window)
+    dispatcher.loop(window)
+    results.close()
+
+
+class ProcessGroup:
+    """Runs a group of controllers in a worker process with its own Dispatcher
+
+    setup(dispatcher, window) creates the worker's controllers; it must be picklable
+    (e.g. a module level function). The worker process is spawned, not forked from the GUI's
+    threads: it imports setup's module anew. The GUI's dispatcher forwards the events with given
+    keys or patterns. The worker's controllers use window[key].update(...) (or any other element
+    method without a result) and window.write_event_value(...) as usual; these reach
+    the GUI's window in a batch after each event.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        window: sg.Window,
+        setup: Callable[[Dispatcher, Any], Any],
+        keys: Optional[List[Hashable]] = None,
+        patterns: Optional[List[Hashable]] = None,
+    ):
+        self._window = window
+        context = multiprocessing.get_context("spawn")
+        worker_events, self._events = context.Pipe(duplex=False)
+        self._results, worker_results = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=_serve, args=(worker_events, worker_results, setup), daemon=True
+        )
+        self._process.start()
+        worker_events.close()
+        worker_results.close()
+        # each group applies its own element calls
+        self._calls_event = f"-PSGA CALLS {id(self)}-"
+        threading.Thread(target=self._receive, daemon=True).start()
+
+        dispatcher.register(action(name=self._calls_event)(self._apply_calls))
+        dispatcher.register(action(keys=keys, patterns=patterns, with_event=True)(self._forward))
+
+    def _forward(self, values, event):
+        self._events.send((event, values))
+
+    def _receive(self):
+        while True:
+            try:
+                message = self._results.recv()
+            except EOFError:  # the worker's process ended
+                return
+            if isinstance(message, list):
+                self._window.write_event_value(self._calls_event, message)
+            else:
+                self._window.write_event_value(*message)
+
+    def _apply_calls(self, values):
+        for key, method, args, kwargs in values[self._calls_event]:
+            getattr(self._window[key], method)(*args, **kwargs)
+
+    def close(self, timeout: Optional[float] = None):
+        """Ends the worker's loop and waits for its process to end"""
+        try:
+            self._events.send(None)
+        except OSError:  # e.g. a broken pipe, the worker's process ended already
+            pass
+        self._process.join(timeout)
+        self._events.close()
+
+
+class TimerEvent(NamedTuple):
+    """The value of a timer's event"""
+
+    scheduled: float  # the (missed) deadline, in the scheduler's clock
+    lateness: float  # seconds after the deadline
+    missed: int  # the coalesced deadlines that passed before this one
+
+
+_CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))  # minute hour day month weekday
+
+
+def _cron_field(text: str, low: int, high: int) -> set:
+    values = set()
+    for part in text.split(","):
+        span, _, step = part.partition("/")
+        if "*" == span:
+            start, stop = low, high
+        elif "-" in span:
+            start, stop = map(int, span.split("-"))
+        else:
+            start = int(span)
+            stop = high if step else start
+        if not low <= start <= stop <= high or (step and int(step) < 1):
+            raise ValueError(f"Invalid cron field: {text}")
+        values.update(range(start, stop + 1, int(step or 1)))
+    return values
+
+
+class _Cron:
+    """A cron-like "minute hour day month weekday" specification (weekday 0 is Sunday)"""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, spec: str):
+        if 5 != len(fields := spec.split()):
+            raise ValueError(f"Invalid cron specification: {spec}")
+        self._minutes, self._hours, self._days, self._months, self._weekdays = (
+            _cron_field(field, *limits) for field, limits in zip(fields, _CRON_RANGES)
+        )
+        self._any_day, self._any_weekday = "*" == fields[2], "*" == fields[4]
+
+    def _is_day(self, moment: datetime.datetime) -> bool:
+        day, weekday = moment.day in self._days, (moment.weekday() + 1) % 7 in self._weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday  # as cron does when both are restricted
+
+    def next(self, after: float) -> float:
+        """Returns the first (wall clock) time after given time that matches"""
+        moment = datetime.datetime.fromtimestamp(after).replace(second=0, microsecond=0)
+        moment += datetime.timedelta(minutes=1)
+        year = moment.year
+        while moment.year <= year + 4:  # e.g. a 29th of February on a Monday
+            if moment.month not in self._months:
+                moment = moment.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)
+                moment = moment.replace(day=1)
+            elif not self._is_day(moment):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif moment.hour not in self._hours:
+                moment = moment.replace(minute=0) + datetime.timedelta(hours=1)
+            elif moment.minute not in self._minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError("The cron specification never matches")
+
+
+class Timer:
+    """A scheduled timer; see Scheduler"""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, key: Hashable, interval: Optional[float], cron: Optional[_Cron]):
+        self.key = key
+        self.interval = interval  # seconds between the deadlines of a periodic timer
+        self.cron = cron
+        self.deadline = 0.0
+        self.fired = 0
+        self.lateness = 0.0  # of the last firing
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the timer"""
+        self.cancelled = True
+
+
+class Scheduler:
+    """Fires timer events from the Dispatcher's loop
+
+    The loop's read waits until the next deadline (see Dispatcher.before_read);
+    a timer's event (e.g. an action's name) is dispatched with a TimerEvent as its value.
+    A periodic timer that missed deadlines (e.g. a slow handler) fires once and keeps its phase.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self._dispatcher = dispatcher
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._timers: List[Tuple[float, int, Timer]] = []  # a heap on the deadline
+        self._count = 0  # keeps the order of timers with the same deadline
+        dispatcher.register(self._on_timeout)
+        dispatcher.before_read(self.timeout)
+        dispatcher.after_dispatch(self.run, dispatches=True)  # before e.g. ViewState.flush
+
+    def _schedule(self, timer: Timer, deadline: float) -> Timer:
+        timer.deadline = deadline
+        self._count += 1
+        heapq.heappush(self._timers, (deadline, self._count, timer))
+        return timer
+
+    def _cron_deadline(self, cron: _Cron, after: float) -> float:
+        """Converts the cron's next wall clock time to the scheduler's clock"""
+        wall = self._wall_clock()
+        return self._clock() + cron.next(wall + after - self._clock()) - wall
+
+    def after(self, seconds: float, key: Hashable) -> Timer:
+        """Fires the key's event once, after given seconds"""
+        return self._schedule(Timer(key, None, None), self._clock() + seconds)
+
+    def every(self, seconds: float, key: Hashable, delay: Optional[float] = None) -> Timer:
+        """Fires the key's event each given seconds, the first time after delay seconds"""
+        if not seconds > 0:  # also NaN, else the loop would fire the timer without end
+            raise ValueError(f"Invalid period: {seconds}")
+        timer = Timer(key, seconds, None)
+        return self._schedule(timer, self._clock() + (seconds if delay is None else delay))
+
+    def cron(self, spec: str, key: Hashable) -> Timer:
+        """Fires the key's event at the times that match the spec (e.g. "*/5 8-18 * * 1-5")"""
+        cron = _Cron(spec)
+        return self._schedule(Timer(key, None, cron), self._cron_deadline(cron, self._clock()))
+
+    def timeout(self) -> Optional[Tuple[int, Hashable]]:
+        """Returns the milliseconds until the next deadline with the scheduler's timeout key"""
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return None
+        remaining = self._timers[0][0] - self._clock()
+        return max(0, math.ceil(round(remaining * 1000, 6))), self._on_timeout.name
+
+    def run(self):
+        """Dispatches the events of the timers whose deadline passed"""
+        now = self._clock()
+        while self._timers and self._timers[0][0] <= now:
+            deadline, _, timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            missed = 0
+            if timer.interval is not None:
+                missed = int((now - deadline) // timer.interval)
+                deadline += missed * timer.interval
+                self._schedule(timer, deadline + timer.interval)
+            elif timer.cron is not None:
+                while (after := self._cron_deadline(timer.cron, deadline)) <= now:
+                    missed, deadline = missed + 1, after
+                self._schedule(timer, after)
+            timer.fired += 1
+            timer.lateness = now - deadline
+            event = TimerEvent(deadline, timer.lateness, missed)
+            if not self._dispatcher.dispatch(timer.key, {timer.key: event}):
+                logging.getLogger("PSGA").warning("Unhandled event: %s", timer.key)
+
+    @action()
+    def _on_timeout(self, _):
+        pass  # the loop runs the due timers after each event
+
+
+class MemoryReport(NamedTuple):
+    """A Profiler's report, the growths are in bytes since the previous report"""
+
+    modules: List[Tuple[str, int]]  # the largest growths per module
+    actions: List[Tuple[str, int]]  # the largest growths per action's name
+    controllers: int  # the controllers with registered handlers
+    handlers: int  # the registered handlers
+    traced: int  # the traced bytes
+
+
+class Profiler:
+    """Reports the allocation growth by module and by action, toggled at run time
+
+    The on_toggle event (e.g. window.bind("<F12>", Profiler.on_toggle.name)) starts tracing
+    the allocations, or stops it with a last report. The on_report events (e.g. a Scheduler's)
+    report in between. An allocation counts for the innermost action in its traceback.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, frames: int = 25, limit: int = 10):
+        self._dispatcher = dispatcher
+        self._frames = frames
+        self._limit = limit
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = False  # else someone else traces
+        self.report: Optional[MemoryReport] = None  # the last one
+        dispatcher.register(self.on_toggle).register(self.on_report)
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+
+    @action(name="-PSGA PROFILE-")
+    def on_toggle(self, _):
+        """Starts tracing the allocations, or reports and stops"""
+        if self._snapshot is None:
+            self._started = not tracemalloc.is_tracing()
+            if self._started:
+                tracemalloc.start(self._frames)
+            self._snapshot = self._take()
+        else:
+            self.on_report(None)
+            self._snapshot = None
+            if self._started:
+                tracemalloc.stop()
+
+    @staticmethod
+    def _actions(handlers: List[Action]) -> Dict[Tuple[str, int], str]:
+        """Returns the action's name per (file name, line number) of its handler's code"""
+        lines = {}
+        for handler in handlers:
+            function = getattr(handler, "__func__", handler)
+            while hasattr(function, "__wrapped__"):
+                function = function.__wrapped__
+            if (code := getattr(function, "__code__", None)) is not None:
+                for _, line in dis.findlinestarts(code):
+                    lines[(code.co_filename, line)] = handler.name
+        return lines
+
+    @staticmethod
+    def _by_action(snapshot: tracemalloc.Snapshot, lines) -> collections.Counter:
+        sizes = collections.Counter()
+        for statistic in snapshot.statistics("traceback"):
+            for frame in reversed(statistic.traceback):  # from the most recent frame
+                if (name := lines.get((frame.filename, frame.lineno))) is not None:
+                    sizes[name] += statistic.size
+                    break
+        return sizes
+
+    @action()
+    def on_report(self, _):
+        """Logs and keeps the report on the growth since the previous report"""
+        if self._snapshot is None:
+            return
+        snapshot, handlers = self._take(), self._dispatcher.handlers()
+
+        modules_by_file = {
+            getattr(module, "__file__", None): name for name, module in list(sys.modules.items())
+        }
+        modules = collections.Counter()
+        for statistic in snapshot.compare_to(self._snapshot, "filename"):
+            filename = statistic.traceback[0].filename
+            modules[modules_by_file.get(filename, filename)] += statistic.size_diff
+
+        lines = self._actions(handlers)
+        actions = self._by_action(snapshot, lines)
+        actions.subtract(self._by_action(self._snapshot, lines))
+
+        self.report = MemoryReport(
+            modules.most_common(self._limit),
+            actions.most_common(self._limit),
+            len(
+                {
+                    id(owner)
+                    for handler in handlers
+                    if isinstance(owner := getattr(handler, "__self__", None), Controller)
+                }
+            ),
+            len(handlers),
+            tracemalloc.get_traced_memory()[0],
+        )
+        self._snapshot = snapshot
+        logging.getLogger("PSGA").info("%s", self.report)
+
+
+class Snapshot:
+    """Saves the state of controllers and models to a compact file and restores it at launch
+
+    An added object has the get_state() and set_state(state) methods of a Controller.
+    The file holds msgpack when installed, else JSON. Restore before the loop's first read,
+    save after the loop or on the on_save events (e.g. a Scheduler's).
+    """
+
+    def __init__(self, dispatcher: Dispatcher, path: str):
+        self._path = path
+        self._objects: Dict[str, Any] = {}
+        dispatcher.register(self.on_save)
+
+    def add(self, name: str, stateful) -> Self:
+        """Adds an object whose state is saved under the given name"""
+        self._objects[name] = stateful
+        return self
+
+    @action(name="-PSGA SNAPSHOT-")
+    def on_save(self, _):
+        """Saves the snapshot"""
+        self.save()
+
+    def save(self):
+        """Writes the added objects' state, a reader never sees a partly written file"""
+        states = {name: stateful.get_state() for name, stateful in self._objects.items()}
+        if msgpack is not None:
+            data = b"m" + msgpack.packb(states)
+        else:
+            data = b"j" + json.dumps(states, separators=(",", ":")).encode()
+        with open(temporary := self._path + ".tmp", "wb") as file:
+            file.write(data)
+        os.replace(temporary, self._path)
+
+    def restore(self) -> bool:
+        """Restores the added objects' state, returns False without a readable snapshot"""
+        try:
+            with open(self._path, "rb") as file:
+                data = file.read()
+            if data[:1] == b"m" and msgpack is not None:
+                states = msgpack.unpackb(data[1:], strict_map_key=False)
+            elif data[:1] == b"j":
+                states = json.loads(data[1:])
+            else:
+                raise ValueError("unknown format")
+        except (OSError, ValueError) as ex:
+            logging.getLogger("PSGA").info("No snapshot restored from %s: %s", self._path, ex)
+            return False
+        for name, state in states.items():
+            if state is not None and (stateful := self._objects.get(name)) is not None:
+                try:
+                    stateful.set_state(state)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    # e.g. an older version's state, the other objects are still restored
+                    logging.getLogger("PSGA").exception("No state restored for %s", name)
+        return True
+
+
+class Backpressure(enum.Enum):
+    """What an EventChannel does with a new event when it is full"""
+
+    BLOCK = "block"  # the producer waits for room
+    DROP_OLDEST = "drop_oldest"  # the oldest pending event is discarded
+    COALESCE = "coalesce"  # a pending event with the same key is replaced, else BLOCK
+
+
+class ChannelMetrics(NamedTuple):
+    """An EventChannel's counters"""
+
+    depth: int  # pending events
+    peak_depth: int
+    dropped: int
+    coalesced: int
+    delivered: int
+
+
+class EventChannel:
+    """A bounded channel for events from background threads to the Dispatcher's loop.
+
+    Use its write_event_value instead of sg.Window.write_event_value.
+    At most one wake-up event is pending in the window's (unbounded) queue;
+    the channel's handler then dispatches all pending events.
+    The thread creating the channel (the loop's thread) never blocks: it drops the oldest instead.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        window: sg.Window,
+        maxsize: int = 1000,
+        policy: Backpressure = Backpressure.BLOCK,
+        coalesce_key: Optional[Callable[[Hashable, Any], Hashable]] = None,
+    ):
+        if maxsize < 1:  # a full channel drops the oldest pending event
+            raise ValueError(f"Invalid maxsize: {maxsize}")
+        self._window = window
+        self._maxsize = maxsize
+        self._policy = policy
+        self._coalesce_key = coalesce_key or (lambda key, _: key)
+        self._owner = threading.get_ident()
+        self._condition = threading.Condition()
+        self._events = collections.deque()  # of [key, value, coalesce key] entries
+        self._pending: Dict[Hashable, list] = {}  # coalesce key -> entry
+        self._woken = False
+        self._peak_depth = self._dropped = self._coalesced = self._delivered = 0
+        # each channel wakes up its own handler
+        self._wake_event = f"-PSGA EVENTS {id(self)}-"
+        dispatcher.register(action(name=self._wake_event)(self._on_events))
+        self._dispatcher = dispatcher
+
+    @property
+    def metrics(self) -> ChannelMetrics:
+        """Returns a snapshot of the channel's counters"""
+        with self._condition:
+            return ChannelMetrics(
+                len(self._events), self._peak_depth, self._dropped, self._coalesced, self._delivered
+            )
+
+    def _drop_oldest(self):
+        _, _, pending_key = entry = self._events.popleft()
+        if self._pending.get(pending_key) is entry:
+            del self._pending[pending_key]
+        self._dropped += 1
+
+    def write_event_value(self, key: Hashable, value: Any, timeout: Optional[float] = None) -> bool:
+        """Queues an event, returns False if it was dropped after waiting timeout seconds"""
+        with self._condition:
+            pending_key = None
+            if self._policy is Backpressure.COALESCE:
+                pending_key = self._coalesce_key(key, value)
+                if (entry := self._pending.get(pending_key)) is not None:
+                    entry[1] = value
+                    self._coalesced += 1
+                    return True
+
+            if len(self._events) >= self._maxsize:
+                if self._policy is Backpressure.DROP_OLDEST or self._owner == threading.get_ident():
+                    self._drop_oldest()
+                elif not self._condition.wait_for(
+                    lambda: len(self._events) < self._maxsize, timeout
+                ):
+                    self._dropped += 1
+                    return False
+
+            self._events.append(entry := [key, value, pending_key])
+            if pending_key is not None:
+                self._pending[pending_key] = entry
+            self._peak_depth = max(self._peak_depth, len(self._events))
+            wake, self._woken = not self._woken, True
+
+        if wake:
+            self._window.write_event_value(self._wake_event, None)
+        return True
+
+    def _on_events(self, values):
+        with self._condition:
+            events, self._events = self._events, collections.deque()
+            self._pending.clear()
+            self._woken = False
+            self._delivered += len(events)
+            self._condition.notify_all()
+
+        for key, value, _ in events:
+            if not self._dispatcher.dispatch(key, {**(values or {}), key: value}):
+                logging.getLogger("PSGA").warning("Unhandled event: %s", key)
@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("requests")
+
+from model import Model  # pylint: disable=wrong-import-position
+
+import psga  # pylint: disable=wrong-import-position
+
+
+class _Requests:
+    """A fake request scheduler: the test answers the submitted requests in any order"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, _events, key, request, cookie, priority=None, stale=None):
+        del priority, stale
+        self.submitted.append((key, request.method, cookie))
+
+
+def _model():
+    window, requests = MagicMock(), _Requests()
+    return Model(psga.Dispatcher(), window, requests=requests), window, requests
+
+
+def _handler(model: Model, key: str):
+    return next(
+        handler
+        for handler in (model._on_refreshed, model._on_created, model._on_deleted)
+        if handler.name == key
+    )
+
+
+def _answer(model: Model, requests: _Requests, index: int, payload):
+    key, _, cookie = requests.submitted[index]
+    response = MagicMock(headers={}, **{"json.return_value": payload})
+    _handler(model, key)({key: (response, cookie)})
+
+
+def _items(window) -> list:
+    return window.write_event_value.call_args.args[1]
+
+
+def test_model_reapplies_pending_writes_on_reads():
+    model, window, requests = _model()
+    model.read("r")
+    model.delete("r", 1)
+    model.create("r", id=9, name="new")
+
+    _answer(model, requests, 0, [{"id": 1}, {"id": 2}])  # the read was sent before the writes
+    assert [{"id": 2}, {"id": 9, "name": "new"}] == _items(window)
+
+    _answer(model, requests, 2, {"id": 9, "name": "server"})
+    assert [{"id": 2}, {"id": 9, "name": "server"}] == _items(window)
+    assert 3 == len(requests.submitted)
+
+
+def test_model_rereads_reads_older_than_a_confirmed_write():
+    model, window, requests = _model()
+    model.read("r")
+    model.create("r", id=9, name="new")
+    _answer(model, requests, 1, {"id": 9, "name": "server"})
+
+    _answer(model, requests, 0, [{"id": 1}])  # it misses the confirmed creation
+    assert [{"id": 9, "name": "server"}] == _items(window)
+    assert ("GET", ("r", 1)) == requests.submitted[2][1:]  # sent again
+
+    _answer(model, requests, 2, [{"id": 1}, {"id": 9, "name": "server"}])
+    assert [{"id": 1}, {"id": 9, "name": "server"}] == _items(window)
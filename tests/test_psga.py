@@ -1,6 +1,14 @@
+import datetime
 import logging
+import multiprocessing
+import queue
+import threading
+import tracemalloc
 from typing import Callable
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call, create_autospec
+
+import PySimpleGUI as sg
+import pytest
 
 import psga
 
@@ -200,3 +208,812 @@ def test_dispatcher_loop():
     assert handler3_invoked == 1
     assert handler4_invoked == 0
     assert handler5_invoked == 2
+
+
+def test_dispatcher_non_string_events():
+    invoked = []
+    dispatcher = psga.Dispatcher()
+    dispatcher.register(psga.action(name=5)(invoked.append))
+    dispatcher.register(psga.action(name=("-ONE-",))(invoked.append))
+    dispatcher.register(psga.action(patterns=["-TABLE-*"])(invoked.append))
+
+    assert dispatcher.dispatch(5, 1)
+    assert dispatcher.dispatch(("-ONE-",), 2)
+    assert not dispatcher.dispatch(6, 3)
+    assert not dispatcher.dispatch(("-TWO-",), 4)
+    assert not dispatcher.dispatch((), 5)
+    assert invoked == [1, 2]
+
+
+def _drain(dispatcher, mock_window):
+    for (event, value), _ in mock_window.write_event_value.call_args_list:
+        dispatcher.dispatch(event, {event: value})
+    mock_window.write_event_value.reset_mock()
+
+
+def test_event_channel_block():
+    received = []
+
+    @psga.action(name="data")
+    def handler(values):
+        received.append(values["data"])
+
+    mock_window = MagicMock()
+    dispatcher = psga.Dispatcher().register(handler)
+    channel = psga.EventChannel(dispatcher, mock_window, maxsize=2)
+
+    assert channel.write_event_value("data", 1)
+    assert channel.write_event_value("data", 2)
+    assert mock_window.write_event_value.call_count == 1  # a single pending wake-up
+
+    # another thread than the loop's blocks when the channel is full
+    results = []
+    producer = threading.Thread(target=lambda: results.append(channel.write_event_value("data", 3)))
+    producer.start()
+    producer.join(0.05)
+    assert producer.is_alive()
+
+    _drain(dispatcher, mock_window)
+    producer.join()
+    assert results == [True]
+    _drain(dispatcher, mock_window)
+    assert received == [1, 2, 3]
+
+    # a producer gives up after its timeout
+    channel.write_event_value("data", 4)
+    channel.write_event_value("data", 5)
+    producer = threading.Thread(
+        target=lambda: results.append(channel.write_event_value("data", 6, timeout=0.01))
+    )
+    producer.start()
+    producer.join()
+    assert results == [True, False]
+
+    # the loop's thread never blocks
+    assert channel.write_event_value("data", 7)
+    _drain(dispatcher, mock_window)
+    assert received == [1, 2, 3, 5, 7]
+    assert channel.metrics == psga.ChannelMetrics(0, 2, 2, 0, 5)
+
+
+def test_event_channels():
+    received = []
+    mock_window = MagicMock()
+    dispatcher = psga.Dispatcher().register(psga.action(name="data")(received.append))
+    channels = [psga.EventChannel(dispatcher, mock_window, maxsize=1) for _ in range(2)]
+
+    assert channels[0].write_event_value("data", 1)
+    assert channels[1].write_event_value("data", 2)
+    wake_ups = [args[0] for args, _ in mock_window.write_event_value.call_args_list]
+    assert 2 == len(set(wake_ups))
+    _drain(dispatcher, mock_window)  # each wake-up delivers its own channel's events once
+    assert [values["data"] for values in received] == [1, 2]
+    assert [channel.metrics.delivered for channel in channels] == [1, 1]
+
+    for maxsize in (0, -1):
+        with pytest.raises(ValueError):
+            psga.EventChannel(dispatcher, mock_window, maxsize=maxsize)
+
+
+def test_event_channel_drop_oldest(caplog):
+    received = []
+
+    @psga.action(name="data")
+    def handler(values):
+        received.append(values["data"])
+
+    mock_window = MagicMock()
+    dispatcher = psga.Dispatcher().register(handler)
+    channel = psga.EventChannel(dispatcher, mock_window, 2, psga.Backpressure.DROP_OLDEST)
+
+    for value in range(4):
+        channel.write_event_value("data", value)
+    channel.write_event_value("unknown", None)
+    assert channel.metrics == psga.ChannelMetrics(2, 2, 3, 0, 0)
+
+    _drain(dispatcher, mock_window)
+    assert received == [3]
+    assert "Unhandled event: unknown" in caplog.text
+
+
+def test_event_channel_coalesce():
+    received = []
+
+    @psga.action(keys=["a", "b"])
+    def handler(values):
+        received.append(values.get("a", values.get("b")))
+
+    mock_window = MagicMock()
+    dispatcher = psga.Dispatcher().register(handler)
+    channel = psga.EventChannel(
+        dispatcher,
+        mock_window,
+        2,
+        psga.Backpressure.COALESCE,
+        coalesce_key=lambda key, value: (key, value[0]),
+    )
+
+    channel.write_event_value("a", (1, "old"))
+    channel.write_event_value("b", (1, "first"))
+    channel.write_event_value("a", (1, "new"))
+    channel.write_event_value("a", (2, "dropped"))  # full: the loop's thread drops the oldest
+    assert channel.metrics == psga.ChannelMetrics(2, 2, 1, 1, 0)
+
+    _drain(dispatcher, mock_window)
+    assert received == [(1, "first"), (2, "dropped")]
+
+
+def test_action_patterns():
+    @psga.action(patterns=["-ROW-*"])
+    def my_action(_):
+        pass
+
+    assert getattr(my_action, "patterns") == ["-ROW-*"]
+    assert psga.action()(lambda _: None).patterns is None
+
+
+def test_dispatcher_patterns():
+    invoked = []
+
+    @psga.action(name="-ROW-0-", patterns=["-ROW-*", "-ROW-?-"])
+    def rows(values):
+        invoked.append(("rows", values))
+
+    @psga.action(patterns=["-ROW-1?-", "*-"])
+    def ends(values):
+        invoked.append(("ends", values))
+
+    @psga.action(patterns=[("-TABLE-", "+CLICKED+", (psga.ANY, 2))])
+    def column(values):
+        invoked.append(("column", values))
+
+    @psga.action(patterns=[("-TABLE-", "+CLICKED+", psga.ANY), ("-OTHER-", psga.ANY, psga.ANY)])
+    def cells(values):
+        invoked.append(("cells", values))
+
+    dispatcher = psga.Dispatcher().register(rows).register(ends).register(column).register(cells)
+
+    # an exact match takes precedence over the patterns
+    assert dispatcher.dispatch("-ROW-0-", 0)
+    assert invoked == [("rows", 0)]
+
+    # all matching patterns in their registration order, each handler once
+    invoked.clear()
+    assert dispatcher.dispatch("-ROW-1-", 1)
+    assert invoked == [("rows", 1), ("ends", 1)]
+
+    invoked.clear()
+    assert dispatcher.dispatch("-ROW-12-", 2)
+    assert dispatcher.dispatch("Menu item::-ROW-", 3)
+    assert dispatcher.dispatch("-COL-1-", 4)
+    assert not dispatcher.dispatch("-COL-1", 5)
+    assert invoked == [("rows", 2), ("ends", 2), ("rows", 3), ("ends", 3), ("ends", 4)]
+
+    invoked.clear()
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (5, 2)), 6)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (-1, 3)), 7)
+    assert dispatcher.dispatch(("-OTHER-", "+CLICKED+", (1, 1)), 8)
+    assert not dispatcher.dispatch(("-OTHER-", "+DOUBLE+"), 9)
+    assert not dispatcher.dispatch(("-TABLE-", "+DOUBLE+", (5, 2)), 10)
+    assert invoked == [("column", 6), ("cells", 6), ("cells", 7), ("cells", 8)]
+
+
+def test_dispatcher_patterns_tuple_fallback():
+    invoked = []
+
+    @psga.action(name="-TABLE-", patterns=[("-TABLE-", "+CLICKED+", (-1, psga.ANY))])
+    def heading(values):
+        invoked.append(values)
+
+    dispatcher = psga.Dispatcher().register(heading)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (-1, 0)), "pattern")
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (3, 0)), "name")
+    assert not dispatcher.dispatch(("-TABLE-", "+OTHER+", (3, 0)), "none")
+    assert invoked == ["pattern", "name"]
+
+
+def test_dispatcher_patterns_repeated_wildcards():
+    invoked = []
+
+    @psga.action(patterns=["**-*", "-*-"])
+    def handler(values):
+        invoked.append(values)
+
+    dispatcher = psga.Dispatcher().register(handler)
+    assert dispatcher.dispatch("-A-B-C-", 1)
+    assert not dispatcher.dispatch("ABC", 2)
+    assert invoked == [1]
+
+
+def test_dispatcher_patterns_literal():
+    invoked = []
+
+    @psga.action(patterns=[r"-PRICE\*-?", r"-WHAT\?-*", "-PATH\\", ("-GRID*-", psga.ANY)])
+    def handler(values):
+        invoked.append(values)
+
+    dispatcher = psga.Dispatcher().register(handler)
+    assert dispatcher.dispatch("-PRICE*-1", 1)
+    assert not dispatcher.dispatch("-PRICE-1", 2)
+    assert dispatcher.dispatch("-WHAT?-now", 3)
+    assert not dispatcher.dispatch("-WHAT!-now", 4)
+    assert dispatcher.dispatch("-PATH\\", 5)  # a trailing backslash matches itself
+    assert dispatcher.dispatch(("-GRID*-", 1), 6)  # a string within a tuple matches literally
+    assert not dispatcher.dispatch(("-GRID-1-", 1), 7)
+    assert invoked == [1, 3, 5, 6]
+
+
+def test_dispatcher_cell_events():
+    invoked = []
+
+    @psga.action(name="-TABLE-")
+    def rows(values):
+        invoked.append(("rows", values))
+
+    @psga.action(patterns=[psga.heading("-TABLE-")], with_event=True)
+    def headings(values, event):
+        invoked.append(("heading", event[2][1]))
+
+    @psga.action(keys=[psga.cell("-TABLE-", 2, 1)], patterns=[psga.cell("-TABLE-", column=3)])
+    def cells(values):
+        invoked.append(("cell", values))
+
+    assert psga.heading("-TABLE-", 0) == ("-TABLE-", "+CLICKED+", (-1, 0))
+    assert headings.with_event and not rows.with_event
+
+    dispatcher = psga.Dispatcher().register(rows).register(headings).register(cells)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (-1, 4)), 1)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (2, 1)), 2)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (7, 3)), 3)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (7, 1)), 4)
+    assert invoked == [("heading", 4), ("cell", 2), ("cell", 3), ("rows", 4)]
+
+
+def test_view_state():
+    mock_window = MagicMock()
+    mock_window.configure_mock(
+        **{"read.side_effect": [("table", {}), ("unknown", {}), ("Exit", {})]}
+    )
+    elements = {
+        "-TABLE-": create_autospec(sg.Table, instance=True),
+        "-TEXT-": create_autospec(sg.Text, instance=True),
+        "-LOG-": create_autospec(sg.Multiline, instance=True),
+        "-ANY-": MagicMock(),  # an update without a signature to merge on
+    }
+    mock_window.__getitem__.side_effect = elements.__getitem__
+
+    dispatcher = psga.Dispatcher()
+    view = psga.ViewState(dispatcher, mock_window)
+
+    @psga.action(name="table")
+    def handler(_):
+        view["-TABLE-"].update(values=[[1]], num_rows=1)
+        view["-TABLE-"].update(values=[[2]])
+        view["-TABLE-"].set_right_click_menu(["", ["Copy"]])
+        view["-TABLE-"].update(select_rows=[0])  # after the menu
+        view["-TEXT-"].update(value="first")
+        view["-TEXT-"].update("last", visible=True)  # the same argument, by position
+        view["-LOG-"].update("a\n", append=True)
+        view["-LOG-"].update("b\n", append=True)
+        view["-LOG-"].print("p1")
+        view["-LOG-"].print("p2")
+        view["-ANY-"].update("x")
+        view["-ANY-"].update("y")
+
+    dispatcher.register(handler)
+    dispatcher.loop(mock_window)
+
+    table, text, log = elements["-TABLE-"], elements["-TEXT-"], elements["-LOG-"]
+    assert table.mock_calls == [
+        call.update(values=[[2]], num_rows=1),
+        call.set_right_click_menu(["", ["Copy"]]),
+        call.update(select_rows=[0]),
+    ]
+    assert text.update.call_args_list == [call(value="last", visible=True)]
+    assert log.mock_calls == [
+        call.update("a\n", append=True),
+        call.update("b\n", append=True),
+        call.print("p1"),
+        call.print("p2"),
+    ]
+    assert elements["-ANY-"].update.call_args_list == [call("x"), call("y")]
+
+    # an iteration without calls flushes nothing
+    view.flush()
+    assert 2 == table.update.call_count
+
+    view["-TEXT-"].update("wrong", value="twice")  # applied as called, as the window would
+    with pytest.raises(TypeError):
+        view.flush()
+
+
+def test_store():
+    mock_window = MagicMock()
+    elements = {"-TABLE-": MagicMock(), "-COUNT-": MagicMock()}
+    mock_window.__getitem__.side_effect = elements.__getitem__
+    computed = []
+
+    def _row(id_):
+        def _compute(store):
+            computed.append(id_)
+            return [id_, store.get(("item", id_))["name"]]
+
+        return _compute
+
+    store = psga.Store(psga.Dispatcher(), mock_window)
+    for id_ in (1, 2):
+        store.set(("item", id_), {"name": f"name {id_}"})
+        store.derive(("row", id_), _row(id_))
+    store.set("ids", [1, 2])
+    store.derive("rows", lambda store: [store.get(("row", id_)) for id_ in store.get("ids")])
+    store.derive("count", lambda store: len(store.get("ids")))
+    store.bind("rows", "-TABLE-", "values")
+    store.bind("count", "-COUNT-")
+    assert computed == []  # lazy
+
+    store.flush()
+    assert elements["-TABLE-"].update.call_args_list == [
+        call(values=[[1, "name 1"], [2, "name 2"]])
+    ]
+    assert elements["-COUNT-"].update.call_args_list == [call(value=2)]
+    assert computed == [1, 2]
+
+    # only the changed row is recomputed, only the table is updated
+    store.set(("item", 2), {"name": "renamed"})
+    store.set(("item", 1), {"name": "name 1"})  # unchanged
+    store.flush()
+    assert computed == [1, 2, 2]
+    assert elements["-TABLE-"].update.call_args_list[-1] == call(
+        values=[[1, "name 1"], [2, "renamed"]]
+    )
+    assert 1 == elements["-COUNT-"].update.call_count
+
+    # memoized, an unchanged result does not update the element
+    assert store.get("rows") == [[1, "name 1"], [2, "renamed"]]
+    store.derive(("row", 1), _row(1))
+    store.flush()
+    assert computed == [1, 2, 2, 1]
+    assert 2 == elements["-TABLE-"].update.call_count
+
+    store.delete(("row", 2))
+    store.set("ids", [1])
+    store.flush()
+    assert elements["-TABLE-"].update.call_args_list[-1] == call(values=[[1, "name 1"]])
+    assert elements["-COUNT-"].update.call_args_list[-1] == call(value=1)
+    assert store.get("unknown", 42) == 42
+
+    # deleting leaves no bookkeeping behind, e.g. re-queried rows in a long session
+    for round_ in range(100):
+        ids = list(range(10 * round_, 10 * round_ + 10))
+        for id_ in ids:
+            store.set(("item", id_), {"name": "new"})
+            store.derive(("row", id_), _row(id_))
+        store.set("ids", ids)
+        store.flush()
+        for id_ in ids:
+            store.delete(("row", id_))
+            store.delete(("item", id_))
+    store.set("ids", [])
+    store.delete("count")
+    store.flush()
+    assert ("row", 0) not in store._dependencies
+    assert ("item", 0) not in store._dependents
+    assert "count" not in store._bindings
+    assert ("-COUNT-", "value") not in store._applied
+    assert set(store._dependencies) == {"rows"}
+    assert set(store._dependents) == {"ids"}
+    assert store._dependents["ids"] == {"rows"}
+
+
+def test_store_through_view_state():
+    mock_window = MagicMock()
+    mock_window.configure_mock(**{"read.side_effect": [("data", {}), ("Exit", {})]})
+    table = create_autospec(sg.Table, instance=True)
+    mock_window.__getitem__.side_effect = {"-TABLE-": table}.__getitem__
+
+    dispatcher = psga.Dispatcher()
+    view = psga.ViewState(dispatcher, mock_window)
+    store = psga.Store(dispatcher, view)  # constructed after the view, flushed before it
+    store.bind("rows", "-TABLE-", "values")
+
+    @psga.action(name="data")
+    def handler(_):
+        store.set("rows", [[1], [2]])
+        view["-TABLE-"].update(select_rows=[1])
+
+    dispatcher.register(handler)
+    dispatcher.loop(mock_window)
+
+    assert table.mock_calls == [call.update(values=[[1], [2]], select_rows=[1])]
+
+
+def _setup_worker(dispatcher, window):
+    @psga.action(name="square", patterns=["square *"])
+    def square(values):
+        window["-RESULT-"].update(values["number"] ** 2)
+        window["-RESULT-"].set_tooltip("squared")
+        window.write_event_value("squared", values["number"])
+
+    dispatcher.register(square)
+
+
+def test_process_group():
+    events = queue.Queue()
+    mock_window = MagicMock()
+    mock_window.write_event_value.side_effect = lambda key, value: events.put((key, value))
+    squared = []
+
+    @psga.action(name="squared")
+    def on_squared(values):
+        squared.append(values["squared"])
+
+    dispatcher = psga.Dispatcher().register(on_squared)
+    group = psga.ProcessGroup(dispatcher, mock_window, _setup_worker, ["square"], ["square *"])
+
+    assert dispatcher.dispatch("square", {"number": 3})
+    assert dispatcher.dispatch("square again", {"number": 4})
+    for _ in range(4):  # each event's element calls, then its event
+        key, value = events.get(timeout=10)
+        assert dispatcher.dispatch(key, {key: value})
+    group.close(10)
+
+    assert squared == [3, 4]
+    assert mock_window["-RESULT-"].update.call_args_list == [call(9), call(16)]
+    assert mock_window["-RESULT-"].set_tooltip.call_count == 2
+
+
+def test_process_groups():
+    events = queue.Queue()
+    mock_window = MagicMock()
+    mock_window.write_event_value.side_effect = lambda key, value: events.put((key, value))
+
+    dispatcher = psga.Dispatcher().register(psga.action(name="squared")(lambda _: None))
+    groups = [
+        psga.ProcessGroup(dispatcher, mock_window, _setup_worker, keys=["square"]),
+        psga.ProcessGroup(dispatcher, mock_window, _setup_worker, patterns=["square *"]),
+    ]
+
+    assert dispatcher.dispatch("square", {"number": 2})
+    assert dispatcher.dispatch("square again", {"number": 3})
+    for _ in range(4):
+        key, value = events.get(timeout=10)
+        assert dispatcher.dispatch(key, {key: value})
+    for group in groups:
+        group.close(10)
+
+    # each group applies only its own worker's element calls
+    assert sorted(mock_window["-RESULT-"].update.call_args_list) == [call(4), call(9)]
+    assert mock_window["-RESULT-"].set_tooltip.call_count == 2
+
+
+def test_process_group_close_after_worker_died():
+    group = psga.ProcessGroup(psga.Dispatcher(), MagicMock(), _setup_worker, keys=["square"])
+    assert isinstance(group._process, multiprocessing.get_context("spawn").Process)
+
+    group._process.kill()
+    group._process.join(10)
+    group.close(10)  # the pipe is broken
+    assert not group._process.is_alive()
+
+
+def test_remote_window():
+    events, gui_events = multiprocessing.Pipe(duplex=False)
+    gui_results, results = multiprocessing.Pipe(duplex=False)
+    window = psga._RemoteWindow(events, results)
+
+    assert window.read(0, "timeout") == ("timeout", {})
+    window["-TEXT-"].update("text")
+    gui_events.send(("event", {}))
+    assert window.read() == ("event", {})
+    assert gui_results.recv() == [("-TEXT-", "update", ("text",), {})]
+    assert not gui_results.poll()
+
+    gui_events.close()
+    assert window.read() == (None, None)
+
+
+def test_serve():
+    events, gui_events = multiprocessing.Pipe(duplex=False)
+    gui_results, results = multiprocessing.Pipe(duplex=False)
+    worker = threading.Thread(target=psga._serve, args=(events, results, _setup_worker))
+    worker.start()
+
+    gui_events.send(("square", {"number": 5}))
+    gui_events.send(None)
+    worker.join()
+    assert gui_results.recv() == [
+        ("-RESULT-", "update", (25,), {}),
+        ("-RESULT-", "set_tooltip", ("squared",), {}),
+    ]
+    assert gui_results.recv() == ("squared", 5)
+
+
+def test_scheduler_loop():
+    now = 0.0
+    fired, timeouts = [], []
+
+    def _read(timeout_ms, timeout_key):
+        nonlocal now
+        timeouts.append(timeout_ms)
+        if 3 < now:
+            return "Exit", {}
+        now += timeout_ms / 1000
+        return timeout_key, {}
+
+    @psga.action(name="tick", keys=["once"])
+    def handler(values):
+        fired.append((now, values))
+
+    mock_window = MagicMock()
+    mock_window.read.side_effect = _read
+    dispatcher = psga.Dispatcher().register(handler)
+    scheduler = psga.Scheduler(dispatcher, lambda: now)
+    scheduler.every(1.0, "tick")
+    scheduler.after(2.5, "once")
+    scheduler.after(0.1, "cancelled").cancel()
+
+    dispatcher.loop(mock_window, 5000, "user")
+    assert timeouts == [1000, 1000, 500, 500, 1000, 1000]
+    assert fired == [
+        (1.0, {"tick": psga.TimerEvent(1.0, 0.0, 0)}),
+        (2.0, {"tick": psga.TimerEvent(2.0, 0.0, 0)}),
+        (2.5, {"once": psga.TimerEvent(2.5, 0.0, 0)}),
+        (3.0, {"tick": psga.TimerEvent(3.0, 0.0, 0)}),
+        (4.0, {"tick": psga.TimerEvent(4.0, 0.0, 0)}),
+    ]
+
+    # the loop's own earlier timeout
+    mock_window.read.side_effect = [("Exit", {})]
+    dispatcher.loop(mock_window, 100, "user")
+    assert mock_window.read.call_args == call(100, "user")
+
+
+def test_scheduler_flushes_view():
+    now = 0.0
+    text = create_autospec(sg.Text, instance=True)
+    mock_window = MagicMock()
+    mock_window.__getitem__.return_value = text
+    reads = []
+
+    def _read(timeout_ms, timeout_key):
+        nonlocal now
+        reads.append((timeout_ms, text.update.call_count))
+        now += 1
+        return (timeout_key, {}) if 1 == len(reads) else ("Exit", {})
+
+    mock_window.read.side_effect = _read
+    dispatcher = psga.Dispatcher()
+    view = psga.ViewState(dispatcher, mock_window)  # flushes after the scheduler's timers
+    dispatcher.register(psga.action(name="tick")(lambda _: view["-TEXT-"].update("ticked")))
+    psga.Scheduler(dispatcher, clock=lambda: now).after(1, "tick")
+    dispatcher.loop(mock_window)
+
+    # the timer's update reached the element before the read without a timeout
+    assert reads == [(1000, 0), (None, 1)]
+
+
+def test_scheduler_missed(caplog):
+    now = 0.0
+    fired = []
+
+    @psga.action(name="tick")
+    def handler(values):
+        fired.append(values["tick"])
+
+    scheduler = psga.Scheduler(psga.Dispatcher().register(handler), lambda: now)
+    assert scheduler.timeout() is None
+    timer = scheduler.every(1.0, "tick", delay=0.2)
+    scheduler.after(1.0, "cancelled").cancel()
+
+    now = 3.5  # e.g. a slow handler
+    scheduler.run()
+    assert [(3.2, 3)] == [(pytest.approx(event.scheduled), event.missed) for event in fired]
+    assert pytest.approx(0.3) == fired[0].lateness == timer.lateness and 1 == timer.fired
+    assert scheduler.timeout()[0] == 700  # the timer kept its phase
+    timer.cancel()
+    assert scheduler.timeout() is None
+
+    scheduler.after(0, "unknown")
+    scheduler.run()
+    assert "Unhandled event: unknown" in caplog.text
+
+    for seconds in (0, -1, float("nan")):  # would fire without end
+        with pytest.raises(ValueError):
+            scheduler.every(seconds, "tick")
+    assert scheduler.timeout() is None
+
+
+def test_scheduler_cron():
+    now = 0.0
+    start = datetime.datetime(2024, 1, 1)  # a Monday
+    scheduler = psga.Scheduler(psga.Dispatcher(), lambda: now, lambda: start.timestamp() + now)
+
+    def _at(spec):
+        return start + datetime.timedelta(seconds=scheduler.cron(spec, spec).deadline)
+
+    assert _at("*/15 * * * *") == datetime.datetime(2024, 1, 1, 0, 15)
+    assert _at("0 9 * * 1-5") == datetime.datetime(2024, 1, 1, 9)
+    assert _at("30 8,20 2 * *") == datetime.datetime(2024, 1, 2, 8, 30)
+    assert _at("0 0 29 2 *") == datetime.datetime(2024, 2, 29)
+    assert _at("0 0 13 * 5") == datetime.datetime(2024, 1, 5)  # the 13th or a Friday
+    assert _at("0 12 * 3 0") == datetime.datetime(2024, 3, 3, 12)
+
+    for spec in ["* * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *", "0 0 31 2 *"]:
+        with pytest.raises(ValueError):
+            scheduler.cron(spec, "invalid")
+
+    fired = []
+    dispatcher = psga.Dispatcher().register(psga.action(name="cron")(fired.append))
+    scheduler = psga.Scheduler(dispatcher, lambda: now, lambda: start.timestamp() + now)
+    timer = scheduler.cron("*/15 * * * *", "cron")
+    now = 46 * 60
+    scheduler.run()
+    assert fired == [{"cron": psga.TimerEvent(45 * 60, 60, 2)}]
+    assert 60 * 60 == timer.deadline
+
+
+def test_profiler(caplog):
+    kept = []
+
+    class _LeakyController(psga.Controller):
+        @psga.action(name="leak")
+        def on_leak(self, _):
+            kept.append(bytearray(100_000))
+
+    dispatcher = psga.Dispatcher().register(psga.action(name="keep")(kept.append))  # no code
+    _LeakyController(dispatcher)
+    profiler = psga.Profiler(dispatcher)
+
+    profiler.on_report(None)  # not tracing yet
+    assert profiler.report is None
+
+    assert dispatcher.dispatch(psga.Profiler.on_toggle.name, {})
+    assert tracemalloc.is_tracing()
+    dispatcher.dispatch("leak", {})
+    dispatcher.dispatch(profiler.on_report.name, {})
+    report = profiler.report
+    assert dict(report.actions)["leak"] >= 100_000
+    assert dict(report.modules)["test_psga"] >= 100_000
+    assert (report.controllers, report.handlers) == (1, 4)
+    assert "MemoryReport(" in caplog.text
+
+    dispatcher.dispatch("leak", {})
+    dispatcher.dispatch(psga.Profiler.on_toggle.name, {})
+    assert not tracemalloc.is_tracing()
+    assert dict(profiler.report.actions)["leak"] >= 100_000
+    assert profiler.report is not report
+
+
+def test_profiler_traced_by_others():
+    tracemalloc.start()
+    profiler = psga.Profiler(psga.Dispatcher())
+    profiler.on_toggle(None)
+    profiler.on_toggle(None)
+    assert tracemalloc.is_tracing()
+    tracemalloc.stop()
+
+
+def test_snapshot(tmp_path, monkeypatch, caplog):
+    class _TabsCtr(psga.Controller):
+        def __init__(self, dispatcher):
+            super().__init__(dispatcher)
+            self.tab, self.selected = "-TAB-", {1: [0, 2]}
+
+        def get_state(self):
+            return {"tab": self.tab, "selected": self.selected}
+
+        def set_state(self, state):
+            self.tab, self.selected = state["tab"], state["selected"]
+
+    path = str(tmp_path / "snapshot")
+    dispatcher = psga.Dispatcher()
+    snapshot = psga.Snapshot(dispatcher, path).add("tabs", _TabsCtr(dispatcher))
+    snapshot.add("none", psga.Controller(dispatcher))  # has no state
+    assert not snapshot.restore()  # no file yet
+    dispatcher.dispatch(psga.Snapshot.on_save.name, {})
+
+    restored, other = _TabsCtr(dispatcher), MagicMock(**{"get_state.return_value": None})
+    snapshot = psga.Snapshot(dispatcher, path).add("tabs", restored).add("none", other)
+    restored.tab = None
+    assert snapshot.restore()
+    assert (restored.tab, restored.selected) == ("-TAB-", {1: [0, 2]})
+    other.set_state.assert_not_called()
+
+    monkeypatch.setattr(psga, "msgpack", None)
+    assert not snapshot.restore()  # cannot read msgpack
+    restored.selected = {"1": [0]}  # JSON's keys are strings
+    snapshot.save()
+    restored.selected = None
+    assert snapshot.restore() and restored.selected == {"1": [0]}
+
+    # an object that rejects its state does not keep the others from being restored
+    broken = MagicMock(**{"get_state.return_value": {}, "set_state.side_effect": KeyError("tab")})
+    snapshot = psga.Snapshot(dispatcher, path).add("broken", broken).add("tabs", restored)
+    snapshot.save()
+    restored.selected = None
+    caplog.set_level(logging.ERROR, "PSGA")
+    assert snapshot.restore() and restored.selected == {"1": [0]}
+    assert "No state restored for broken" in caplog.text
+
+    with open(path, "wb") as file:
+        file.write(b"{}")
+    assert not snapshot.restore()
+
+
+def test_dispatcher_compile(caplog):
+    invoked = []
+
+    def _handler(name, **kwargs):
+        return psga.action(name=name, **kwargs)(lambda values: invoked.append((name, values)))
+
+    handlers = [
+        _handler("-OPEN-"),
+        _handler("Ok", keys=["-IN-"]),
+        _handler("-TABLE-"),
+        _handler(None, patterns=[psga.heading("-TABLE-")]),
+        _handler("Copy"),
+        _handler("-DEEP-"),
+        _handler("-GONE-"),
+        _handler("-BACKGROUND-"),
+    ]
+    dispatcher = psga.Dispatcher()
+    for handler in handlers:
+        dispatcher.register(handler)
+
+    in_element, tuple_element = sg.I(k="-IN-", enable_events=True), sg.I(k=("-T-", 1))
+    layout = [
+        [sg.Menu([["&File", ["&Open::-OPEN-", "!Save::-SAVE-", "---", "E\\&xit"]]])],
+        [sg.B("Ok"), in_element, sg.I(k="-QUIET-"), sg.FileBrowse(), tuple_element],
+        [
+            sg.Table(
+                [[1]],
+                ["a"],
+                k="-TABLE-",
+                enable_click_events=True,
+                right_click_menu=["", ["Co&py"]],
+            )
+        ],
+        [sg.ButtonMenu("Button menu", ["", ["a::-A-"]], k="-BM-")],
+    ]
+    window = sg.Window("compile", layout, right_click_menu=["", ["Sub", ["Deep::-DEEP-"]]])
+    window.user_bind_dict["<F1>"] = "-HELP-"  # as window.bind() does
+    in_element.user_bind_dict["<Return>"] = "+RETURN+"
+    tuple_element.user_bind_dict["<Return>"] = "+RETURN+"
+
+    graph = dispatcher.compile(window, events=["-BACKGROUND-"])
+    assert list(graph.table) == ["Deep::-DEEP-", "Open::-OPEN-", "Ok", "-IN-", "-TABLE-", "Copy"]
+    assert graph.table["Open::-OPEN-"] == (handlers[0],)
+    assert graph.unhandled == [
+        "-HELP-",
+        "Save::-SAVE-",
+        "E\\&xit",
+        "-IN-+RETURN+",
+        (("-T-", 1), "+RETURN+"),
+        "-BM-",
+    ]
+    assert graph.dead == ["-GONE-"]
+    assert "Unhandled keys" in caplog.text and "-GONE-" in caplog.text
+    with pytest.raises(TypeError):
+        graph.table["-GONE-"] = ()
+
+    assert dispatcher.dispatch("Open::-OPEN-", 1)
+    assert dispatcher.dispatch(("-TABLE-", "+CLICKED+", (-1, 0)), 2)
+    assert invoked == [("-OPEN-", 1), (None, 2)]
+
+    dispatcher.register(_handler("Ok"))  # clears the compiled table
+    assert dispatcher.dispatch("Ok", 3)
+    assert invoked[-2:] == [("Ok", 3), ("Ok", 3)]
+
+    empty = dispatcher.compile(sg.Window("empty", [[]]))
+    assert (dict(empty.table), empty.unhandled) == ({}, [])
+    assert empty.dead == [
+        "-OPEN-",
+        "Ok",
+        "-IN-",
+        "-TABLE-",
+        "Copy",
+        "-DEEP-",
+        "-GONE-",
+        "-BACKGROUND-",
+    ]
+    assert psga.Dispatcher().compile(sg.Window("empty", [[]])) == ({}, [], [])
@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from throttle import RequestScheduler, _TokenBucket  # pylint: disable=wrong-import-position
+
+
+class _Transport:
+    """A fake session: each request stays in flight until the test releases its URL"""
+
+    def __init__(self):
+        self.started = queue.Queue()
+        self._released = {}
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def _event(self, url: str) -> threading.Event:
+        with self._lock:
+            return self._released.setdefault(url, threading.Event())
+
+    def prepare_request(self, request):
+        return request
+
+    def send(self, request):
+        if request.url.endswith("/invalid"):
+            raise ValueError(request.url)
+        self.started.put(request.url)
+        assert self._event(request.url).wait(10)
+        return MagicMock()
+
+    def release(self, url: str):
+        self._event(url).set()
+
+    def next_started(self) -> str:
+        return self.started.get(timeout=10)
+
+
+class _Events:
+    def __init__(self):
+        self.events = queue.Queue()
+        self.responses = []
+
+    def write_event_value(self, key, value):
+        self.responses.append(value[0])
+        self.events.put((key, value[1]))
+
+    def get(self):
+        return self.events.get(timeout=10)
+
+
+def _submit(scheduler, events, url, **kwargs):
+    scheduler.submit(events, "done", requests.Request("GET", url), url, **kwargs)
+
+
+def _queued(scheduler, host: str) -> int:
+    with scheduler._condition:
+        return sum(1 for _, _, queued in scheduler._hosts[host].queue if not queued.cancelled)
+
+
+def test_token_bucket():
+    now = 0.0
+    bucket = _TokenBucket(rate=10, capacity=2, clock=lambda: now)
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.1)  # the burst is spent
+    now += 0.05
+    assert bucket.take() == pytest.approx(0.05)
+    now += 0.05
+    assert bucket.take() == 0
+    now += 100  # an idle bucket refills up to its capacity
+    assert [bucket.take() for _ in range(2)] == [0, 0]
+    assert bucket.take() > 0
+
+
+def test_request_scheduler_priority_and_stale_reads():
+    transport, events = _Transport(), _Events()
+    scheduler = RequestScheduler(concurrency=1, rate=1000, burst=1000, session=transport)
+
+    _submit(scheduler, events, "http://host/read/1", stale="trails")
+    assert transport.next_started() == "http://host/read/1"
+    _submit(scheduler, events, "http://host/read/2", stale="trails")  # the first is in flight
+    _submit(scheduler, events, "http://host/read/3", stale="trails")  # replaces the queued one
+    _submit(scheduler, events, "http://host/write", priority=RequestScheduler.WRITE)
+    assert 1 == scheduler.cancelled
+
+    transport.release("http://host/read/1")
+    assert events.get() == ("done", "http://host/read/1")  # the sent read is not cancelled
+    assert transport.next_started() == "http://host/write"  # before the queued read
+    transport.release("http://host/write")
+    assert transport.next_started() == "http://host/read/3"
+    transport.release("http://host/read/3")
+
+    assert events.get() == ("done", "http://host/write")
+    assert events.get() == ("done", "http://host/read/3")
+    assert transport.started.empty() and events.events.empty()
+    assert 3 == scheduler.sent
+
+
+def test_request_scheduler_concurrency_per_host():
+    transport, events = _Transport(), _Events()
+    scheduler = RequestScheduler(concurrency=2, rate=1000, burst=1000, session=transport)
+
+    for i in range(4):
+        _submit(scheduler, events, f"http://one/{i}")
+    _submit(scheduler, events, "http://two/0")  # another host has its own limit
+    started = {transport.next_started() for _ in range(3)}
+    assert started == {"http://one/0", "http://one/1", "http://two/0"}
+    assert 2 == scheduler._hosts["one"].in_flight
+    assert 2 == _queued(scheduler, "one")
+
+    transport.release("http://one/0")
+    assert transport.next_started() == "http://one/2"
+    assert 2 == scheduler._hosts["one"].in_flight
+    for url in ("http://one/1", "http://one/2", "http://two/0"):
+        transport.release(url)
+    assert transport.next_started() == "http://one/3"
+    transport.release("http://one/3")
+    assert 5 == len([events.get() for _ in range(5)])
+
+
+def test_request_scheduler_rate():
+    now = 0.0
+    transport, events = _Transport(), _Events()
+    scheduler = RequestScheduler(
+        concurrency=2, rate=20, burst=1, clock=lambda: now, session=transport
+    )
+
+    _submit(scheduler, events, "http://host/0")
+    _submit(scheduler, events, "http://host/1")
+    assert transport.next_started() == "http://host/0"
+    with pytest.raises(queue.Empty):  # the bucket is empty while the clock stands still
+        transport.started.get(timeout=0.2)
+    assert 1 == _queued(scheduler, "host")
+
+    now += 0.05  # a token later
+    assert transport.next_started() == "http://host/1"
+    for i in range(2):
+        transport.release(f"http://host/{i}")
+    assert 2 == len([events.get() for _ in range(2)])
+
+
+class _ClosedWindow:
+    def write_event_value(self, key, value):
+        raise RuntimeError("closed")
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_request_scheduler_worker_errors():
+    transport, events = _Transport(), _Events()
+    scheduler = RequestScheduler(concurrency=1, rate=1000, burst=1000, session=transport)
+
+    _submit(scheduler, events, "http://host/invalid")  # the request's error is its response
+    assert events.get() == ("done", "http://host/invalid")
+    assert isinstance(events.responses[0], ValueError)
+
+    transport.release("http://host/closed")
+    _submit(scheduler, _ClosedWindow(), "http://host/closed")  # the worker ends
+    host = scheduler._hosts["host"]
+    for _ in range(1000):
+        with scheduler._condition:
+            if 0 == host.workers:
+                break
+        time.sleep(0.01)
+    assert (0, 0) == (host.workers, host.in_flight)
+
+    transport.release("http://host/next")
+    _submit(scheduler, events, "http://host/next")  # served by another worker
+    assert events.get() == ("done", "http://host/next")